@@ -1,6 +1,6 @@
 import streamlit as st
 
-from st_widgets.commons import app_config
+from st_widgets.commons import app_config, show_cache_stats, show_memory_usage
 from st_widgets.console import session_console
 
 
@@ -11,4 +11,8 @@ if __name__ == "__main__":
         app_description = "".join(readme).split("# Installation")[0]
 
     st.markdown(app_description)
+    with st.sidebar.expander("Cache statistics"):
+        show_cache_stats()
+    with st.sidebar.expander("Memory usage"):
+        show_memory_usage()
     session_console()
@@ -0,0 +1,89 @@
+"""
+Micro-benchmarks comparing the current implementation of a function against the
+one it replaced. Run each module from the repository root, ex:
+
+    python -m benchmarks.preprocess_dataset
+"""
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+
+def best_of(function: Callable, *args, repeat: int = 3, **kwargs) -> float:
+    """Return the best wall-clock time (in seconds) out of `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def synthetic_raw_dataset(
+    n_rows: int, n_times: int, nan_ratio: float = 0.3, seed: int = 42
+) -> pd.DataFrame:
+    """Emulate a wide dataset as downloaded by `eurostat.get_data_df(flags=True)`."""
+    rng = np.random.default_rng(seed)
+    geos = np.array([f"G{i:02d}" for i in range(40)])
+    df = pd.DataFrame(
+        {
+            "freq": "A",
+            "unit": rng.choice(["PC", "NR", "EUR"], n_rows),
+            "indic": np.char.add("I", (np.arange(n_rows) // len(geos)).astype(str)),
+            "geo\\TIME_PERIOD": np.resize(geos, n_rows),
+        }
+    )
+    flags = np.array(["", ":", "u", "p ", ": c", "e"], dtype=object)
+    columns = {}
+    for year in range(2000, 2000 + n_times):
+        values = rng.random(n_rows) * 100
+        values[rng.random(n_rows) < nan_ratio] = np.nan
+        columns[f"{year}_value"] = values
+        columns[f"{year}_flag"] = rng.choice(
+            flags, n_rows, p=[0.6, 0.2, 0.1, 0.05, 0.03, 0.02]
+        )
+    return pd.concat([df, pd.DataFrame(columns)], axis=1)
+
+
+def synthetic_codelist(data: pd.DataFrame) -> pd.DataFrame:
+    """Emulate a parsed codelist describing every code found in `data`."""
+    codes = {
+        name: level
+        for name, level in zip(data.index.names, data.index.levels)  # type: ignore
+        if name != "time"
+    }
+    codes["obs_flag"] = pd.Index(data["flag"].dropna().unique())
+    frames = {
+        dimension: pd.DataFrame(
+            {
+                "dimension_label": f"Description of {dimension}",
+                "code_label": "Description of " + level.astype(str),
+            },
+            index=pd.Index(level, name="code"),
+        )
+        for dimension, level in codes.items()
+    }
+    return pd.concat(frames, names=["dimension"]).sort_index()
+
+
+def peak_memory_mb(function: Callable, *args, **kwargs) -> float:
+    """Return the peak memory (in MB) allocated while running `function`."""
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def memory_mb(data: pd.DataFrame) -> float:
+    return data.memory_usage(deep=True).sum() / 2**20
+
+
+def report(title: str, unit: str = "s", **measures: float):
+    print(title)
+    for name, measure in measures.items():
+        print(f"  {name:<12} {measure:10.3f} {unit}")
@@ -0,0 +1,42 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks import best_of, report, synthetic_codelist, synthetic_raw_dataset
+from datawizard.data import (
+    append_code_descriptions,
+    cast_time_to_datetimeindex,
+    preprocess_dataset,
+)
+from datawizard.utils import concat_keys_to_values, quote_sanitizer
+
+
+def legacy_append_code_descriptions(data: pd.DataFrame, codelist: pd.DataFrame):
+    # Reference implementation, mapping descriptions on every row
+    cols_to_transform = data.index.names.difference(["time"]).union(["flag"])  # type: ignore
+    df = data.reset_index()
+    code2level = codelist["code_label"]
+    for dimension in cols_to_transform:
+        if dimension == "flag":
+            code2description = quote_sanitizer(code2level.loc["obs_flag"]).to_dict()
+        else:
+            code2description = quote_sanitizer(code2level.loc[dimension]).to_dict()
+        code2code_pipe_description = concat_keys_to_values(code2description)
+        df[dimension] = df[dimension].map(code2code_pipe_description)
+    data = df.set_index(data.index.names)
+    return data
+
+
+if __name__ == "__main__":
+    data = cast_time_to_datetimeindex(
+        preprocess_dataset(synthetic_raw_dataset(100_000, 30))
+    )
+    codelist = synthetic_codelist(data)
+    assert_frame_equal(
+        append_code_descriptions(data, codelist),
+        legacy_append_code_descriptions(data, codelist).astype({"flag": "category"}),
+    )
+    report(
+        f"append_code_descriptions: {len(data):,} rows",
+        legacy=best_of(legacy_append_code_descriptions, data, codelist, repeat=1),
+        levels=best_of(append_code_descriptions, data, codelist),
+    )
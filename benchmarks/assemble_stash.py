@@ -0,0 +1,66 @@
+from unittest import mock
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks import best_of, report
+from benchmarks.filter_dataset import selection, synthetic_dataset
+from st_widgets import commons
+from st_widgets.dataframe import empty_eurostat_dataframe, filter_dataset_replacing_NA
+
+
+def legacy_load_stash(datasets: dict, stash: dict) -> pd.DataFrame:
+    # Reference implementation: every dataset filtered, the result grown by each one
+    data = empty_eurostat_dataframe()
+    for code, properties in stash.items():
+        df = filter_dataset_replacing_NA(
+            datasets[code], properties["indexes"], properties["flags"]
+        )
+        df = pd.concat({code: df}, names=["dataset"])
+        data = pd.concat([data.reset_index(), df.reset_index()])
+        data = data.set_index(data.columns.difference(["flag", "value"]).to_list())
+    data["flag"] = data["flag"].astype("category")
+    return data
+
+
+def synthetic_stash_datasets(n_datasets: int) -> dict:
+    # Datasets of 1 to 3 dimensions, named apart but sharing `geo`
+    datasets = {}
+    for i in range(n_datasets):
+        data = synthetic_dataset(1 + i % 3, 20, seed=i)
+        names = ["geo"] + [f"d{i}_{j}" for j in range(1, data.index.nlevels - 1)]
+        datasets[f"DS{i:02d}"] = data.rename_axis(names + ["time"])
+    return datasets
+
+
+def edit_one(stash: dict, code: str, flags: list) -> dict:
+    return {**stash, code: {**stash[code], "flags": flags}}
+
+
+if __name__ == "__main__":
+    datasets = synthetic_stash_datasets(20)
+    stash = {
+        code: {"stash": True, "indexes": selection(data), "flags": ["<NA>", "p"]}
+        for code, data in datasets.items()
+    }
+    versions = pd.Series("2023-06-01 23:00:00", index=list(datasets))
+    with mock.patch.object(
+        commons, "read_dataset", lambda code, version: datasets[code]
+    ), mock.patch.object(commons, "load_last_updates", lambda: versions):
+        stashed = commons.load_stash(stash)
+        assert_frame_equal(
+            stashed, legacy_load_stash(datasets, stash), check_categorical=False
+        )
+        edits = iter(["<NA>", "e", "p"] * 100)
+        report(
+            f"edit a filter of a stash of {len(stash)} datasets, {len(stashed):,} rows",
+            legacy=best_of(
+                lambda: legacy_load_stash(
+                    datasets, edit_one(stash, "DS00", [next(edits)])
+                ),
+                repeat=1,
+            ),
+            memoized=best_of(
+                lambda: commons.load_stash(edit_one(stash, "DS00", [next(edits)]))
+            ),
+        )
@@ -0,0 +1,45 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks import best_of, report, synthetic_raw_dataset
+from datawizard import data as module
+from datawizard.data import cast_time_to_datetimeindex, preprocess_dataset
+
+
+def legacy_cast_time_to_datetimeindex(data: pd.DataFrame):
+    # Reference implementation, supporting annual and monthly periods only
+    time_levels = data.index.levels[data.index.names.index("time")]  # type: ignore
+    format = "%Y" if len(str(time_levels[0])) == 4 else "%YM%m"
+    time_index = pd.to_datetime(time_levels, format=format)
+    data.index = data.index.set_levels(time_index, level="time")  # type: ignore
+    return data.sort_index()
+
+
+def uncached_cast_time_to_datetimeindex(data: pd.DataFrame):
+    module._parsed_periods = module._parsed_periods.iloc[:0]
+    return cast_time_to_datetimeindex(data)
+
+
+def monthly(data: pd.DataFrame) -> pd.DataFrame:
+    # Reuse annual columns as months: 2000 -> 1999M12, 2001 -> 2000M01 ...
+    times = pd.to_datetime(data.index.levels[-1], format="%Y")  # type: ignore
+    months = (times - pd.DateOffset(months=len(times) // 2)).strftime("%YM%m")
+    data.index = data.index.set_levels(months, level="time")  # type: ignore
+    return data
+
+
+if __name__ == "__main__":
+    for frequency, data in {
+        "annual": preprocess_dataset(synthetic_raw_dataset(100_000, 30)),
+        "monthly": monthly(preprocess_dataset(synthetic_raw_dataset(100_000, 30))),
+    }.items():
+        assert_frame_equal(
+            cast_time_to_datetimeindex(data.copy()),
+            legacy_cast_time_to_datetimeindex(data.copy()),
+        )
+        report(
+            f"cast_time_to_datetimeindex: {frequency}, {len(data):,} rows",
+            legacy=best_of(lambda: legacy_cast_time_to_datetimeindex(data.copy())),
+            uncached=best_of(lambda: uncached_cast_time_to_datetimeindex(data.copy())),
+            cached=best_of(lambda: cast_time_to_datetimeindex(data.copy())),
+        )
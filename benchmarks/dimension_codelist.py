@@ -0,0 +1,36 @@
+import pandas as pd
+
+from benchmarks import best_of, memory_mb, report
+from benchmarks.parse_codelist import synthetic_codelist_response
+from datawizard.data import parse_codelist
+
+# Dimensions of a typical dataset, plus flags
+DIMENSIONS = ["DIM0", "DIM1", "DIM2", "DIM3", "DIM4", "DIM5"]
+
+
+def all_codelist(json: dict) -> pd.DataFrame:
+    # Every codelist is parsed, whatever the dataset
+    return parse_codelist(json)
+
+
+def dimension_codelists(items: dict) -> pd.DataFrame:
+    # Only the codelists of dataset dimensions are parsed, one at a time
+    return pd.concat(
+        [parse_codelist({"link": {"item": [items[d]]}}) for d in DIMENSIONS]
+    ).sort_index()
+
+
+if __name__ == "__main__":
+    json = synthetic_codelist_response(2_000, 100)
+    items = {item["extension"]["id"]: item for item in json["link"]["item"]}
+    report(
+        "codelist parsing for a 6 dimensions dataset",
+        all=best_of(all_codelist, json),
+        dimensions=best_of(dimension_codelists, items),
+    )
+    report(
+        "  memory held",
+        unit="MB",
+        all=memory_mb(all_codelist(json)),
+        dimensions=memory_mb(dimension_codelists(items)),
+    )
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks import best_of, peak_memory_mb, report
+from datawizard.data import filter_dataset
+
+
+def legacy_filter_dataset(dataset: pd.DataFrame, indexes: dict, flags: list):
+    # Reference implementation, reshaping time in columns
+    dataset = dataset.copy()
+    flag_dtype = dataset["flag"].dtype
+    indexes = dict(indexes)
+    start, end = indexes.pop("time")
+    complete_index = pd.MultiIndex.from_product(indexes.values(), names=indexes.keys())
+    dataset = dataset.unstack("time").swaplevel(axis=1).sort_index(axis=1)  # type: ignore
+    dataset = dataset.loc[
+        dataset.index.intersection(complete_index),
+        str(start) : str(end),  # flake8: noqa
+    ].dropna(how="all")
+    if dataset.empty:
+        return pd.DataFrame(
+            columns=["flag", "value"],
+            index=pd.MultiIndex(levels=[[], []], codes=[[], []], names=["geo", "time"]),
+        )
+    dataset = dataset.stack("time")  # type: ignore
+    dataset["flag"] = dataset["flag"].astype(flag_dtype)
+    dataset = dataset.loc[dataset.flag.isin(flags)]
+    dataset.index = dataset.index.remove_unused_levels()  # type: ignore
+    return dataset
+
+
+def synthetic_dataset(
+    n_dims: int, n_codes: int, n_times: int = 30, density: float = 0.7, seed: int = 42
+) -> pd.DataFrame:
+    """Emulate a loaded dataset with `n_dims` dimensions of `n_codes` codes each."""
+    rng = np.random.default_rng(seed)
+    levels = [[f"C{i:03d} | Code {i}" for i in range(n_codes)]] * n_dims
+    levels += [pd.date_range("1990", periods=n_times, freq="YS")]
+    index = pd.MultiIndex.from_product(
+        levels, names=[f"d{i}" for i in range(n_dims)] + ["time"]
+    )
+    index = index[rng.random(len(index)) < density]
+    flags = pd.Categorical(
+        rng.choice(["p", "e", None], len(index), p=[0.1, 0.1, 0.8]),  # type: ignore
+    )
+    values = rng.random(len(index))
+    return pd.DataFrame({"flag": flags, "value": values}, index=index)
+
+
+def selection(dataset: pd.DataFrame) -> dict:
+    # Half of the codes of every dimension, half of the years
+    indexes = {
+        name: level[::2].tolist()
+        for name, level in zip(dataset.index.names, dataset.index.levels)  # type: ignore
+        if name != "time"
+    }
+    years = dataset.index.levels[-1].year  # type: ignore
+    indexes["time"] = [years[len(years) // 4], years[3 * len(years) // 4]]
+    return indexes
+
+
+if __name__ == "__main__":
+    for n_dims, n_codes in [(2, 100), (3, 40), (4, 20), (5, 10), (6, 7)]:
+        dataset = synthetic_dataset(n_dims, n_codes)
+        indexes, flags = selection(dataset), [np.nan, "p"]
+        assert_frame_equal(
+            filter_dataset(dataset, indexes, flags),
+            legacy_filter_dataset(dataset, indexes, flags),
+        )
+        report(
+            f"filter_dataset: {n_dims} dimensions x {n_codes} codes, {len(dataset):,} rows",
+            legacy=best_of(legacy_filter_dataset, dataset, indexes, flags, repeat=1),
+            masks=best_of(filter_dataset, dataset, indexes, flags),
+        )
+        report(
+            "  peak memory",
+            unit="MB",
+            legacy=peak_memory_mb(legacy_filter_dataset, dataset, indexes, flags),
+            masks=peak_memory_mb(filter_dataset, dataset, indexes, flags),
+        )
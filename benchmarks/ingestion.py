@@ -0,0 +1,49 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import best_of, peak_memory_mb, report, synthetic_raw_dataset
+from datawizard.data import concat_datasets, preprocess_dataset, read_dataset_tsv
+
+
+def synthetic_dataset_tsv(raw: pd.DataFrame) -> bytes:
+    """Serialize a wide dataset as the gzipped TSV served by Eurostat API."""
+    indexes = raw.columns[~raw.columns.str.contains("value|flag")]
+    times = raw.columns[raw.columns.str.endswith("_value")].str.replace("_value", "")
+    tsv = pd.DataFrame({",".join(indexes): raw[indexes].agg(",".join, axis=1)})
+    for time in times:
+        values = raw[f"{time}_value"].map("{:.1f}".format).replace("nan", ":")
+        flags = raw[f"{time}_flag"].str.replace(":", "").str.strip()
+        tsv[f"{time} "] = values + " " + flags
+    return gzip.compress(tsv.to_csv(sep="\t", index=False).encode())
+
+
+def whole_ingestion(tsv: bytes) -> pd.DataFrame:
+    # The whole TSV is decompressed and parsed at once
+    return preprocess_dataset(
+        next(read_dataset_tsv(io.BytesIO(tsv), blocksize=2**30))
+    )
+
+
+def chunked_ingestion(tsv: bytes, blocksize: int = 2**24) -> pd.DataFrame:
+    chunks = read_dataset_tsv(io.BytesIO(tsv), blocksize)
+    return concat_datasets([preprocess_dataset(chunk) for chunk in chunks])
+
+
+if __name__ == "__main__":
+    tsv = synthetic_dataset_tsv(synthetic_raw_dataset(200_000, 30))
+    data = chunked_ingestion(tsv)
+    assert np.array_equal(data.index.codes, whole_ingestion(tsv).index.codes)  # type: ignore
+    report(
+        f"dataset ingestion: {len(data):,} rows, {len(tsv) / 2**20:.1f}MB gzipped",
+        whole=best_of(whole_ingestion, tsv, repeat=1),
+        chunked=best_of(chunked_ingestion, tsv, repeat=1),
+    )
+    report(
+        "  peak memory",
+        unit="MB",
+        whole=peak_memory_mb(whole_ingestion, tsv),
+        chunked=peak_memory_mb(chunked_ingestion, tsv),
+    )
@@ -0,0 +1,37 @@
+import time
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks import best_of, report
+from st_widgets import commons
+
+# Emulated download + preprocessing time (in seconds) of each stashed dataset
+LATENCIES = {f"DS{i:02d}": 0.1 * i for i in range(1, 11)}
+
+
+def fake_fetch_and_describe_dataset(code, codelists, refresh=False):
+    time.sleep(LATENCIES[code])
+    return pd.DataFrame({"flag": [None], "value": [1.0]})
+
+
+def sequential(codes):
+    commons.load_dataset.clear()
+    return [commons.load_dataset(code) for code in codes]
+
+
+def concurrent(codes):
+    commons.load_dataset.clear()
+    return commons.map_concurrently(lambda code: commons.load_dataset(code), codes)
+
+
+if __name__ == "__main__":
+    codes = list(LATENCIES)
+    with mock.patch.object(
+        commons, "fetch_and_describe_dataset", fake_fetch_and_describe_dataset
+    ), mock.patch.object(commons, "load_last_updates", lambda: pd.Series()):
+        report(
+            f"load {len(codes)} datasets, largest {max(LATENCIES.values()):.1f} s",
+            sequential=best_of(sequential, codes, repeat=1),
+            concurrent=best_of(concurrent, codes, repeat=1),
+        )
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from benchmarks import best_of, report
+from benchmarks.metabase import synthetic_metabase
+from datawizard.index import DatasetIndex
+
+
+def legacy_any(selection: pd.Series) -> pd.Series:
+    # Reference implementation, counting exploded lists of datasets
+    return selection.explode().value_counts()
+
+
+def legacy_all(selection: pd.Series) -> pd.Series:
+    counts = selection.explode().value_counts()
+    return counts[counts == len(selection)]
+
+
+if __name__ == "__main__":
+    metabase = synthetic_metabase(8_000)
+    index = DatasetIndex.from_metabase(metabase)
+    lists = metabase.groupby(["dimension", "code"])["dataset"].apply(list)
+    for n_keys in [10, 200, 2_000]:
+        selection = lists.sample(n_keys, random_state=42)
+        keys = selection.index.tolist()
+        dimensions = [
+            [key for key in keys if key[0] == dimension]
+            for dimension in dict.fromkeys(dimension for dimension, _ in keys)
+        ]
+        assert set(legacy_any(selection).index) == set(index.match([keys]).index)
+        assert set(legacy_all(selection[:3]).index) == set(
+            index.match([[key] for key in keys[:3]]).index
+        )
+        report(
+            f"lookup {n_keys} codes among {len(index.keys):,}, {len(metabase):,} rows",
+            unit="ms",
+            explode_any=1000 * best_of(legacy_any, selection),
+            bits_any=1000 * best_of(index.match, [keys]),
+            explode_all=1000 * best_of(legacy_all, selection),
+            bits_all=1000 * best_of(index.match, [[key] for key in keys]),
+            bits_dims=1000 * best_of(index.match, dimensions),
+        )
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from benchmarks import memory_mb, synthetic_codelist, synthetic_raw_dataset
+from datawizard.data import (
+    append_code_descriptions,
+    cast_time_to_datetimeindex,
+    preprocess_dataset,
+)
+
+
+if __name__ == "__main__":
+    data = cast_time_to_datetimeindex(
+        preprocess_dataset(synthetic_raw_dataset(100_000, 30))
+    )
+    data = append_code_descriptions(data, synthetic_codelist(data))
+    representations = {
+        "row-wise labels": data.reset_index(),
+        "object flags": data.assign(flag=data["flag"].astype(object)),
+        "categorical flags": data,
+    }
+    footprint = pd.DataFrame(
+        {
+            name: frame.memory_usage(deep=True) / 2**20
+            for name, frame in representations.items()
+        }
+    ).T.fillna(0.0)
+    footprint["total"] = [memory_mb(frame) for frame in representations.values()]
+    print(f"Memory footprint [MB] of a loaded dataset: {len(data):,} rows")
+    print(footprint.round(1).to_string())
@@ -0,0 +1,126 @@
+import gzip
+import io
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks import best_of, memory_mb, peak_memory_mb, report
+from datawizard.data import fetch_metabase
+from datawizard.index import DatasetIndex
+
+
+def legacy_fetch_metabase(session) -> pd.DataFrame:
+    # Reference implementation, decompressing and decoding the whole file first
+    resp = session.get()
+    data = gzip.decompress(resp.content).decode("utf-8")
+    return pd.read_csv(
+        io.StringIO(data),
+        delimiter="\t",
+        header=None,
+        names=["dataset", "dimension", "code"],
+    )
+
+
+def legacy_metabase2datasets(metabase: pd.DataFrame, codelist: pd.DataFrame):
+    # Reference implementation, joining labels to every row
+    metabase = metabase.set_index(["dimension", "code"])
+    metabase = metabase.join(codelist)
+    return (
+        metabase.groupby(["code", "code_label", "dimension", "dimension_label"])[
+            "dataset"
+        ]
+        .apply(list)
+        .to_frame()
+    )
+
+
+def synthetic_metabase(n_datasets: int, seed: int = 42) -> pd.DataFrame:
+    """Emulate the Eurostat metabase: every dataset uses a few codes per dimension."""
+    rng = np.random.default_rng(seed)
+    dimensions = [f"dim{i}" for i in range(200)]
+    rows = []
+    for i in range(n_datasets):
+        for dimension in rng.choice(dimensions, 5, replace=False):
+            codes = rng.choice(100, rng.integers(1, 100), replace=False)
+            rows.append(
+                pd.DataFrame(
+                    {"dataset": f"ds_{i}", "dimension": dimension, "code": codes}
+                )
+            )
+    metabase = pd.concat(rows, ignore_index=True)
+    metabase["code"] = "C" + metabase["code"].astype(str)
+    return metabase
+
+
+def synthetic_codelist(metabase: pd.DataFrame) -> pd.DataFrame:
+    keys = metabase[["dimension", "code"]].drop_duplicates()
+    return pd.DataFrame(
+        {
+            "dimension_label": ("Dimension " + keys["dimension"]).to_numpy(),
+            "code_label": ("Code " + keys["code"]).to_numpy(),
+        },
+        index=pd.MultiIndex.from_frame(keys),
+    ).sort_index()
+
+
+if __name__ == "__main__":
+    metabase = synthetic_metabase(8_000)
+    codelist = synthetic_codelist(metabase)
+    session = mock.Mock()
+    session.get.return_value.content = gzip.compress(
+        metabase.to_csv(sep="\t", header=False, index=False).encode()
+    )
+    legacy, streamed = legacy_fetch_metabase(session), fetch_metabase(session)
+    # Same rows, labels stored as categories
+    assert_frame_equal(streamed.astype(object), legacy)
+    report(
+        f"fetch_metabase: {len(metabase):,} rows",
+        legacy=best_of(legacy_fetch_metabase, session),
+        streamed=best_of(fetch_metabase, session),
+    )
+    report(
+        "  peak memory",
+        unit="MB",
+        legacy=peak_memory_mb(legacy_fetch_metabase, session),
+        streamed=peak_memory_mb(fetch_metabase, session),
+    )
+    report(
+        "  memory held",
+        unit="MB",
+        legacy=memory_mb(legacy),
+        streamed=memory_mb(streamed),
+    )
+
+    reverse_index = legacy_metabase2datasets(legacy, codelist)
+    index = DatasetIndex.from_metabase(streamed)
+    report(
+        "reverse index build",
+        lists=best_of(legacy_metabase2datasets, legacy, codelist, repeat=1),
+        csr=best_of(DatasetIndex.from_metabase, streamed),
+    )
+    report(
+        "  peak memory",
+        unit="MB",
+        lists=peak_memory_mb(legacy_metabase2datasets, legacy, codelist),
+        csr=peak_memory_mb(DatasetIndex.from_metabase, streamed),
+    )
+
+    # Datasets counts for a selection of 2000 codes
+    selection = reverse_index.sample(2_000, random_state=42)
+    keys = list(
+        zip(
+            selection.index.get_level_values("dimension"),
+            selection.index.get_level_values("code"),
+        )
+    )
+    assert (
+        selection["dataset"].explode().value_counts().sort_index()
+        == index.count(keys).sort_index()
+    ).all()
+    report(
+        "datasets counts of 2000 codes",
+        explode=best_of(lambda: selection["dataset"].explode().value_counts()),
+        csr=best_of(index.count, keys),
+    )
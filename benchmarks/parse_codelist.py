@@ -0,0 +1,72 @@
+import os
+import tempfile
+from datetime import timedelta
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks import best_of, report
+from datawizard.data import parse_codelist
+from datawizard.store import read_codelist, write_codelist
+
+
+def legacy_parse_codelist(json: dict) -> pd.DataFrame:
+    # Reference implementation, expanding JSON objects row by row
+    df = pd.json_normalize(json)
+    df = df.explode(["link.item"])
+    df = df["link.item"].apply(pd.Series)
+    df = df.rename(columns={"label": "dimension_label"})
+    df = pd.concat(
+        [df[df.columns.difference(["extension"])], df["extension"].apply(pd.Series)],
+        axis=1,
+    )
+    df["category"] = df["category"].apply(pd.Series)["label"]
+    df["category"] = df["category"].apply(lambda d: d.items())
+    df = df.explode("category")
+    df["code"] = df["category"].str[0]
+    df["code_label"] = df["category"].str[1]
+    df = df.drop(columns="category")
+    df["id"] = df["id"].str.lower()
+    df = df.rename(columns={"id": "dimension"})
+    df = df.set_index(["dimension", "code"])[
+        ["dimension_label", "code_label"]
+    ].sort_index()
+    return df
+
+
+def synthetic_codelist_response(n_dimensions: int, n_codes: int) -> dict:
+    """Emulate the JSON of all Eurostat codelists."""
+    return {
+        "link": {
+            "item": [
+                {
+                    "class": "dimension",
+                    "source": "ESTAT",
+                    "category": {
+                        "label": {
+                            f"C{j}": f"Description of code {j}" for j in range(n_codes)
+                        },
+                        "index": [f"C{j}" for j in range(n_codes)],
+                    },
+                    "label": f"Dimension {i}",
+                    "extension": {"lang": "EN", "id": f"DIM{i}", "version": "1.0"},
+                }
+                for i in range(n_dimensions)
+            ]
+        }
+    }
+
+
+if __name__ == "__main__":
+    json = synthetic_codelist_response(2_000, 100)
+    codelist = parse_codelist(json)
+    assert_frame_equal(codelist, legacy_parse_codelist(json))
+    with tempfile.TemporaryDirectory() as path:
+        path = os.path.join(path, "codelist.arrow")
+        write_codelist(codelist, path)
+        report(
+            f"parse_codelist: {len(codelist):,} codes",
+            legacy=best_of(legacy_parse_codelist, json, repeat=1),
+            records=best_of(parse_codelist, json),
+            stored=best_of(read_codelist, timedelta(days=1), path),
+        )
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks import best_of, peak_memory_mb, report, synthetic_raw_dataset
+from datawizard.data import preprocess_dataset
+
+
+def legacy_preprocess_dataset(df: pd.DataFrame) -> pd.DataFrame:
+    # Reference implementation, based on a per-cell `applymap` and `stack`
+    df = df.rename(columns={"geo\\TIME_PERIOD": "geo"})
+    indexes = df.columns[~df.columns.str.contains(r"value|flag")].tolist()
+    df = df.set_index(indexes)
+    values = df.filter(like="value")
+    values.columns = values.columns.str.replace("_value", "")
+    values.columns = pd.MultiIndex.from_product(
+        [["value"], values.columns.tolist()], names=[None, "time"]
+    )
+    flags = df.filter(like="flag")
+    flags.columns = flags.columns.str.replace("_flag", "")
+    flags.columns = pd.MultiIndex.from_product(
+        [["flag"], flags.columns.tolist()], names=[None, "time"]
+    )
+    flags = flags.applymap(lambda s: s.replace(":", "").strip()).replace("", np.nan)
+    return pd.concat([values, flags], axis=1).stack("time", dropna=False)[["value", "flag"]].dropna(how="all", axis=0)  # type: ignore
+
+
+if __name__ == "__main__":
+    for n_rows, n_times in [(10_000, 20), (100_000, 30)]:
+        raw = synthetic_raw_dataset(n_rows, n_times)
+        assert_frame_equal(preprocess_dataset(raw), legacy_preprocess_dataset(raw))
+        report(
+            f"preprocess_dataset: {n_rows * n_times:,} cells",
+            legacy=best_of(legacy_preprocess_dataset, raw, repeat=1),
+            vectorized=best_of(preprocess_dataset, raw),
+        )
+        report(
+            "  peak memory",
+            unit="MB",
+            legacy=peak_memory_mb(legacy_preprocess_dataset, raw),
+            vectorized=peak_memory_mb(preprocess_dataset, raw),
+        )
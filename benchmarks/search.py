@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks import best_of, report
+from datawizard.search import SearchIndex
+
+WORDS = [
+    "population", "employment", "unemployment", "monthly", "annual", "quarterly",
+    "data", "sex", "age", "region", "energy", "prices", "trade", "survey",
+    "business", "consumers", "education", "health", "transport", "agriculture",
+]  # fmt: skip
+
+
+def synthetic_texts(n_texts: int, n_words: int = 10, seed: int = 42) -> pd.Series:
+    """Emulate titles (or codelist labels) made of common words plus rare ones."""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS + [f"word{i}" for i in range(n_texts)], dtype=object)
+    chosen = rng.choice(words, (n_texts, n_words))
+    return pd.Series(
+        [" ".join(text) for text in chosen],
+        index=[f"DS_{i:06d}" for i in range(n_texts)],
+    )
+
+
+def legacy_search(texts: pd.Series, query: str) -> pd.Index:
+    # Reference implementation, scanning every text for every word
+    mask = np.ones(len(texts), dtype=bool)
+    for word in query.lower().split():
+        mask &= texts.str.lower().str.contains(word, regex=False).to_numpy()
+    return texts.index[mask]
+
+
+if __name__ == "__main__":
+    for n_texts in [8_000, 200_000]:
+        texts = synthetic_texts(n_texts)
+        index = SearchIndex.from_texts(texts)
+        for query in ["employment monthly", "word12"]:
+            assert set(index.search(query).index) <= set(legacy_search(texts, query))
+            report(
+                f"search `{query}` in {n_texts:,} texts",
+                unit="ms",
+                scan=1000 * best_of(legacy_search, texts, query),
+                index=1000 * best_of(index.search, query),
+            )
+        report(
+            f"  build index of {n_texts:,} texts",
+            index=best_of(SearchIndex.from_texts, texts, repeat=1),
+        )
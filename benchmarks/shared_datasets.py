@@ -0,0 +1,95 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from benchmarks import best_of, report
+from benchmarks.filter_dataset import synthetic_dataset
+from datawizard.store import (
+    dataset_path,
+    frame_to_index,
+    index_to_frame,
+    read_dataset,
+    write_dataset,
+)
+
+VERSION = "2023-05-30T11:00:00+0200"
+WORKERS = 4
+
+
+def legacy_write_dataset(code: str, data: pd.DataFrame, path: str):
+    # Reference implementation, compressed feather read in memory by every process
+    frame = index_to_frame(data.index)  # type: ignore
+    frame["flag"] = data["flag"].astype("category").values
+    frame["value"] = data["value"].to_numpy()
+    frame.to_feather(dataset_path(code, VERSION, path))
+
+
+def legacy_read_dataset(code: str, path: str) -> pd.DataFrame:
+    frame = pd.read_feather(dataset_path(code, VERSION, path))
+    index = frame_to_index(frame, frame.columns.difference(["flag", "value"]))
+    return pd.DataFrame(
+        {
+            "flag": pd.Series(frame["flag"].values, index=index),
+            "value": pd.Series(frame["value"].to_numpy(), index=index),
+        }
+    )
+
+
+def private_mb() -> float:
+    # Memory of this process only, pages shared with other processes excluded
+    with open("/proc/self/smaps_rollup") as smaps:
+        fields = dict(line.split(":", 1) for line in smaps if ":" in line)
+    private = ["Private_Clean", "Private_Dirty"]
+    return sum(int(fields[name].split()[0]) for name in private) / 2**10
+
+
+def worker_memory(read, code: str, path: str) -> float:
+    # Private memory held by a worker for a dataset, every value touched
+    before = private_mb()
+    data = read(code, VERSION, path) if read is read_dataset else read(code, path)
+    data["value"].sum()
+    return private_mb() - before
+
+
+if __name__ == "__main__":
+    data = synthetic_dataset(4, 30, n_times=60)
+    with tempfile.TemporaryDirectory() as path:
+        write_dataset("MMAP", VERSION, data, path)
+        legacy_write_dataset("FEATHER", data, path)
+        report(
+            f"read a dataset of {len(data):,} rows",
+            feather=best_of(legacy_read_dataset, "FEATHER", path),
+            mmap=best_of(read_dataset, "MMAP", VERSION, path),
+        )
+        with ProcessPoolExecutor(WORKERS) as pool:
+            feather = list(
+                pool.map(
+                    worker_memory,
+                    [legacy_read_dataset] * WORKERS,
+                    ["FEATHER"] * WORKERS,
+                    [path] * WORKERS,
+                )
+            )
+        with ProcessPoolExecutor(WORKERS) as pool:
+            mmap = list(
+                pool.map(
+                    worker_memory,
+                    [read_dataset] * WORKERS,
+                    ["MMAP"] * WORKERS,
+                    [path] * WORKERS,
+                )
+            )
+        report(
+            f"  private memory of {WORKERS} worker processes",
+            unit="MB",
+            feather=sum(feather),
+            mmap=sum(mmap),
+        )
+        report(
+            "  file size",
+            unit="MB",
+            feather=os.path.getsize(dataset_path("FEATHER", VERSION, path)) / 2**20,
+            mmap=os.path.getsize(dataset_path("MMAP", VERSION, path)) / 2**20,
+        )
@@ -0,0 +1,45 @@
+import hashlib
+import pickle
+from unittest import mock
+
+import pandas as pd
+from streamlit.runtime.caching.cache_type import CacheType
+from streamlit.runtime.caching.hashing import update_hash
+
+from benchmarks import best_of, report
+from benchmarks.filter_dataset import selection, synthetic_dataset
+from st_widgets import commons
+
+
+def legacy_rerun(stash: dict, stored: bytes) -> pd.DataFrame:
+    # A hit of `st.cache_data`: arguments hashed by content, stored result unpickled
+    update_hash(stash, hashlib.new("md5"), CacheType.DATA)
+    return pickle.loads(stored)
+
+
+if __name__ == "__main__":
+    datasets = {f"DS{i:02d}": synthetic_dataset(3, 40, seed=i) for i in range(1, 11)}
+    stash = {
+        code: {"stash": True, "indexes": selection(data), "flags": ["<NA>", "p"]}
+        for code, data in datasets.items()
+    }
+    versions = pd.Series("2023-06-01 23:00:00", index=list(datasets))
+    with mock.patch.object(
+        commons, "read_dataset", lambda code, version: datasets[code]
+    ), mock.patch.object(commons, "load_last_updates", lambda: versions):
+        # Reruns find the stash already loaded: only its cache key is computed
+        stashed = commons.load_stash(stash)
+        stored = pickle.dumps(stashed)
+        key_hasher = hashlib.new("md5")
+        report(
+            f"rerun of a stash of {len(stash)} datasets, {len(stashed):,} rows",
+            unit="ms",
+            legacy=1000 * best_of(legacy_rerun, stash, stored, repeat=10),
+            versions=1000 * best_of(commons.load_stash, stash, repeat=10),
+        )
+        report(
+            "  cache key only",
+            unit="ms",
+            legacy=1000 * best_of(update_hash, stash, key_hasher, CacheType.DATA),
+            versions=1000 * best_of(commons.stash_key, stash),
+        )
@@ -0,0 +1,23 @@
+import tempfile
+
+from benchmarks import best_of, report, synthetic_raw_dataset
+from datawizard.data import cast_time_to_datetimeindex, preprocess_dataset
+from datawizard.store import read_dataset, write_dataset
+
+VERSION = "2023-05-30T11:00:00+0200"
+
+
+def parse(raw):
+    return cast_time_to_datetimeindex(preprocess_dataset(raw))[["flag", "value"]]
+
+
+if __name__ == "__main__":
+    raw = synthetic_raw_dataset(200_000, 36)
+    data = parse(raw)
+    with tempfile.TemporaryDirectory() as path:
+        write_dataset("BENCH", VERSION, data, path)
+        report(
+            f"load dataset: {len(data):,} rows",
+            parse=best_of(parse, raw, repeat=1),
+            store=best_of(read_dataset, "BENCH", VERSION, path),
+        )
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from benchmarks import best_of, report
+from benchmarks.search import synthetic_texts
+
+
+def legacy_rerun(toc: pd.Series, options: list, selected: str) -> list:
+    # Reference implementation: a `.loc` lookup per option, then for the subheader
+    format_func = lambda i: i + " | " + toc.loc[i]  # noqa: E731
+    labels = [format_func(option) for option in options]
+    labels.append(selected + " | " + toc.loc[selected])
+    return labels
+
+
+def rerun(labels: dict, options: list, selected: str) -> list:
+    format_func = lambda code: labels.get(code, code)  # noqa: E731
+    formatted = [format_func(option) for option in options]
+    formatted.append(labels.get(selected, selected))
+    return formatted
+
+
+if __name__ == "__main__":
+    toc = synthetic_texts(8_000)
+    labels = dict(zip(toc.index, toc.index + " | " + toc))
+    lookup = toc.index[::40].tolist()
+    for name, options in [("whole toc", toc.index.tolist()), ("lookup", lookup)]:
+        assert legacy_rerun(toc, options, options[-1]) == rerun(
+            labels, options, options[-1]
+        )
+        report(
+            f"format {len(options):,} dataset options ({name})",
+            unit="ms",
+            loc=1000 * best_of(legacy_rerun, toc, options, options[-1]),
+            labels=1000 * best_of(rerun, labels, options, options[-1]),
+        )
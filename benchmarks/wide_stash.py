@@ -0,0 +1,57 @@
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks import best_of, memory_mb, report
+from benchmarks.filter_dataset import selection, synthetic_dataset
+from datawizard.data import stack_datasets, wide_format
+from st_widgets import commons
+
+
+def legacy_rerun(stash: dict) -> pd.DataFrame:
+    # Every page pivoted the (cached) long stash again on every rerun
+    data = commons.load_stash(stash)
+    return data.unstack(data.index.names.difference(["geo", "time"]))  # type: ignore
+
+
+def shift_months(data: pd.DataFrame, months: int) -> pd.DataFrame:
+    # Datasets of different frequencies (ex: monthly, quarterly) share few times
+    index: pd.MultiIndex = data.index  # type: ignore
+    times = index.levels[-1] + pd.DateOffset(months=months)
+    return data.set_axis(index.set_levels(times, level=-1), axis=0)
+
+
+if __name__ == "__main__":
+    datasets = {
+        f"DS{i:02d}": synthetic_dataset(2, 20, seed=i).rename_axis(
+            ["geo", f"d{i}", "time"]
+        )
+        for i in range(20)
+    }
+    stash = {
+        code: {"stash": True, "indexes": selection(data), "flags": ["<NA>", "p"]}
+        for code, data in datasets.items()
+    }
+    versions = pd.Series("2023-06-01 23:00:00", index=list(datasets))
+    with mock.patch.object(
+        commons, "read_dataset", lambda code, version: datasets[code]
+    ), mock.patch.object(commons, "load_last_updates", lambda: versions):
+        wide = commons.load_wide_stash(stash)
+        report(
+            f"widget rerun of a stash pivoted to {wide.shape[1]:,} columns",
+            legacy=best_of(legacy_rerun, stash),
+            cached=best_of(commons.load_wide_stash, stash),
+        )
+
+    data = stack_datasets(
+        {
+            code: shift_months(data, i % 12)
+            for i, (code, data) in enumerate(datasets.items())
+        }
+    )
+    report(
+        f"pivot of {len(data):,} values at 12 different months of the year",
+        unit="MB",
+        dense=memory_mb(wide_format(data)),
+        sparse=memory_mb(wide_format(data, max_dense_columns=120)),
+    )
@@ -0,0 +1,262 @@
+"""
+Keep the cache folder within a size budget, evicting least recently used entries first.
+Show hits, misses, evictions and bytes of stored files and HTTP responses.
+Usage:
+
+    python -m datawizard.cache [--max-mb MB] [--trim] [--vacuum] [--json]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from datetime import timedelta
+from threading import Lock
+from typing import Iterable, Iterator
+
+import pandas as pd
+import requests_cache
+
+from datawizard.definitions import (
+    CACHE_MAX_BYTES,
+    CACHE_PATH,
+    CACHE_STATS_PATH,
+    HTTP_CACHE_PATH,
+)
+
+# Responses never read through a tracked session are aged from their expiry
+HTTP_EXPIRE_AFTER = timedelta(days=7)
+
+# Trims of this process run one at a time, each one seeing the evictions of the last
+_trim_lock = Lock()
+
+
+@contextmanager
+def connect(path: str = CACHE_STATS_PATH) -> Iterator[sqlite3.Connection]:
+    """Open the statistics database, shared by every process using the cache.
+
+    Changes are committed on exit.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    con = sqlite3.connect(path, timeout=30)
+    try:
+        with con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS counters "
+                "(name TEXT PRIMARY KEY, value INTEGER)"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS accesses (key TEXT PRIMARY KEY, time REAL)"
+            )
+            yield con
+    finally:
+        con.close()
+
+
+def record(counts: dict, used: Iterable[str] = (), path: str = CACHE_STATS_PATH):
+    """Add `counts` to the counters, and mark `used` entry keys as accessed now."""
+    with connect(path) as con:
+        con.executemany(
+            "INSERT INTO counters VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            counts.items(),
+        )
+        con.executemany(
+            "INSERT OR REPLACE INTO accesses VALUES (?, ?)",
+            [(key, time.time()) for key in used],
+        )
+
+
+def file_key(filepath: str, path: str = CACHE_PATH) -> str:
+    return os.path.relpath(filepath, path)
+
+
+def record_read(filepath: str, found: bool):
+    """Count a read of a file of the cache folder as a hit or a miss."""
+    key = file_key(filepath)
+    if not key.startswith(os.pardir):  # Files stored elsewhere are not tracked
+        record({"file_hits" if found else "file_misses": 1}, [key] if found else [])
+
+
+def record_response(response, *args, **kwargs):
+    """Count an HTTP response as a hit or a miss, as a `requests` response hook."""
+    key = getattr(response, "cache_key", None)
+    if key is not None:
+        hit = getattr(response, "from_cache", False)
+        record({"http_hits" if hit else "http_misses": 1}, [f"http:{key}"])
+    return response
+
+
+def http_cache_size(http_path: str = HTTP_CACHE_PATH) -> int:
+    """Return the size on disk of the HTTP cache database, its write-ahead log included."""
+    return sum(
+        os.path.getsize(path)
+        for path in (http_path, f"{http_path}-wal")
+        if os.path.exists(path)
+    )
+
+
+def vacuum_http_cache(http_path: str = HTTP_CACHE_PATH):
+    """Rebuild the HTTP cache database, shrinking it from then on whenever trimmed.
+
+    The whole database is copied, with the cache locked meanwhile: run it offline.
+    """
+    with closing(sqlite3.connect(http_path, timeout=30)) as con:
+        con.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        con.execute("VACUUM")
+
+
+def release_http_cache_pages(http_path: str = HTTP_CACHE_PATH):
+    # Deleted rows only free pages inside the database, reused by later responses.
+    # Return them to the file system, if incremental vacuum was enabled
+    with closing(sqlite3.connect(http_path, timeout=30)) as con:
+        con.execute("PRAGMA incremental_vacuum").fetchall()
+
+
+def cache_entries(
+    path: str = CACHE_PATH,
+    http_path: str = HTTP_CACHE_PATH,
+    stats_path: str = CACHE_STATS_PATH,
+) -> pd.DataFrame:
+    """Return stored files and HTTP responses with their size and last use time."""
+    entries = []
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            filepath = os.path.join(root, filename)
+            if filepath in (http_path, stats_path) or filename.endswith(
+                (".tmp", "-journal", "-wal", "-shm")
+            ):
+                continue
+            stat = os.stat(filepath)
+            entries.append((file_key(filepath, path), stat.st_size, stat.st_mtime))
+    if os.path.exists(http_path):
+        with closing(sqlite3.connect(http_path, timeout=30)) as con:
+            responses = con.execute(
+                "SELECT key, LENGTH(value), expires FROM responses"
+            ).fetchall()
+        expire_after = HTTP_EXPIRE_AFTER.total_seconds()
+        entries += [
+            (f"http:{key}", size, expires - expire_after if expires else time.time())
+            for key, size, expires in responses
+        ]
+    entries = pd.DataFrame.from_records(
+        entries, columns=["key", "bytes", "last_used"], index="key"
+    )
+    with connect(stats_path) as con:
+        accesses = pd.read_sql("SELECT * FROM accesses", con, index_col="key")
+    accessed = accesses["time"].reindex(entries.index)
+    entries["last_used"] = accessed.fillna(entries["last_used"])
+    return entries.sort_values("last_used")
+
+
+def trim_cache(
+    max_bytes: int = CACHE_MAX_BYTES,
+    path: str = CACHE_PATH,
+    http_path: str = HTTP_CACHE_PATH,
+    stats_path: str = CACHE_STATS_PATH,
+) -> pd.DataFrame:
+    """Evict least recently used entries until the cache fits in `max_bytes`.
+
+    HTTP responses count as the size of their content, like when evicted.
+    Return the evicted entries.
+    """
+    with _trim_lock:
+        return _trim_cache(max_bytes, path, http_path, stats_path)
+
+
+def _trim_cache(
+    max_bytes: int, path: str, http_path: str, stats_path: str
+) -> pd.DataFrame:
+    entries = cache_entries(path, http_path, stats_path)
+    excess = entries["bytes"].sum() - max_bytes
+    if excess <= 0:
+        return entries.iloc[:0]
+    evicted = entries[entries["bytes"].cumsum().shift(fill_value=0) < excess]
+    responses = evicted.index[evicted.index.str.startswith("http:")]
+    for key in evicted.index.difference(responses):
+        try:
+            os.remove(os.path.join(path, key))
+        except FileNotFoundError:
+            pass  # Evicted by another process meanwhile
+    if len(responses):
+        requests_cache.SQLiteCache(http_path).delete(*responses.str[len("http:") :])
+        release_http_cache_pages(http_path)
+    record(
+        {"evictions": len(evicted), "evicted_bytes": int(evicted["bytes"].sum())},
+        path=stats_path,
+    )
+    with connect(stats_path) as con:
+        con.executemany(
+            "DELETE FROM accesses WHERE key = ?", [(key,) for key in evicted.index]
+        )
+    return evicted
+
+
+def cache_stats(
+    max_bytes: int = CACHE_MAX_BYTES,
+    path: str = CACHE_PATH,
+    http_path: str = HTTP_CACHE_PATH,
+    stats_path: str = CACHE_STATS_PATH,
+) -> dict:
+    """Return counters of hits, misses and evictions, along the cache size."""
+    with connect(stats_path) as con:
+        counters = dict(con.execute("SELECT name, value FROM counters").fetchall())
+    entries = cache_entries(path, http_path, stats_path)
+    is_response = entries.index.str.startswith("http:")
+    stats = {
+        name: counters.get(name, 0)
+        for name in [
+            "file_hits",
+            "file_misses",
+            "http_hits",
+            "http_misses",
+            "evictions",
+            "evicted_bytes",
+        ]
+    }
+    stats.update(
+        files=int((~is_response).sum()),
+        file_bytes=int(entries.loc[~is_response, "bytes"].sum()),
+        responses=int(is_response.sum()),
+        response_bytes=int(entries.loc[is_response, "bytes"].sum()),
+        http_cache_bytes=http_cache_size(http_path),
+        max_bytes=max_bytes,
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=CACHE_MAX_BYTES / 2**20,
+        help="size budget in MB (default: CACHE_MAX_MB environment variable)",
+    )
+    parser.add_argument("--trim", action="store_true", help="evict to fit the budget")
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="rebuild the HTTP cache to shrink it when trimmed (run it offline)",
+    )
+    parser.add_argument("--json", action="store_true", help="print stats as JSON")
+    args = parser.parse_args()
+
+    max_bytes = int(args.max_mb * 2**20)
+    if args.vacuum and os.path.exists(HTTP_CACHE_PATH):
+        vacuum_http_cache()
+    if args.trim:
+        evicted = trim_cache(max_bytes)
+        if not args.json:
+            print(f"{len(evicted)} entries evicted ({evicted['bytes'].sum():,} bytes).")
+    stats = cache_stats(max_bytes)
+    if args.json:
+        print(json.dumps(stats))
+    else:
+        for name, value in stats.items():
+            print(f"{name:>15} {value:,}")
+
+
+if __name__ == "__main__":
+    main()
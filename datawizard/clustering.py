@@ -0,0 +1,196 @@
+"""
+Cluster variables of some datasets by their repeated measures correlation across countries.
+The resulting clustermap is read by the `Correlations` page.
+Usage:
+
+    python -m datawizard.clustering [--workers N] [--file FILE] CODE [CODE ...]
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+from scipy.spatial.distance import squareform
+from scipy.stats import t as student_t
+
+from datawizard.cache import record_read
+from datawizard.data import fetch_and_describe_dataset, get_cached_session
+from datawizard.definitions import CLUSTERING_PATH
+from datawizard.refresh import cached_codelists
+from datawizard.utils import tuple2str
+
+# Variables closer than this correlation distance (1 - |r|) are grouped together
+CLUSTER_DISTANCE = 0.5
+
+# Worker state, set once by `_init_worker` instead of being sent with every block:
+# values with missing ones as 0, their presence mask (1.0 or 0.0) and subjects
+_values = np.empty((0, 0))
+_present = np.empty((0, 0))
+_subjects = np.empty(0, dtype=np.intp)
+
+
+def variable_names(columns: pd.Index) -> List[str]:
+    """Return a name of every variable, its codes in level names order."""
+    if not isinstance(columns, pd.MultiIndex):
+        columns = pd.MultiIndex.from_arrays([columns])
+    names = sorted(columns.names)
+    columns = columns.reorder_levels(names)  # type: ignore
+    return [tuple2str(column, " • ") for column in columns.to_flat_index()]
+
+
+def wide_variables(datasets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Return values of the `datasets` by (geo, time), a column per variable."""
+    variables = []
+    for code, data in datasets.items():
+        data = pd.concat({code: data["value"]}, names=["dataset"])
+        wide = data.unstack(data.index.names.difference(["geo", "time"]))  # type: ignore
+        wide.columns = variable_names(wide.columns)  # type: ignore
+        variables.append(wide)
+    return pd.concat(variables, axis=1)
+
+
+def mask_sparse_subjects(variables: pd.DataFrame) -> pd.DataFrame:
+    """Drop values of countries with less than 2 data points of a variable."""
+    return variables.mask(variables.groupby("geo").transform("count") < 2)
+
+
+def _init_worker(values: np.ndarray, subjects: np.ndarray):
+    global _values, _present, _subjects
+    present = ~np.isnan(values)
+    _values, _present = np.where(present, values, 0.0), present.astype(np.float64)
+    _subjects = subjects
+
+
+def _within_subject_sums(block: np.ndarray) -> Tuple[np.ndarray, ...]:
+    # Sums of squares and products of values centered on their subject means,
+    # over the observations that every pair of (block, any) variables shares
+    shape = (len(block), _values.shape[1])
+    cov, var_x, var_y, n_obs, n_subjects = (np.zeros(shape) for _ in range(5))
+    for subject in np.unique(_subjects):
+        rows = _subjects == subject
+        xs, ms = _values[rows], _present[rows]
+        xb, mb = xs[:, block], ms[:, block]
+        count = mb.T @ ms
+        sum_x, sum_y = xb.T @ ms, mb.T @ xs
+        n = np.maximum(count, 1)
+        cov += xb.T @ xs - sum_x * sum_y / n
+        var_x += (xb**2).T @ ms - sum_x**2 / n
+        var_y += mb.T @ xs**2 - sum_y**2 / n
+        n_obs += count
+        n_subjects += count > 0
+    return cov, var_x, var_y, n_obs, n_subjects
+
+
+def rm_correlation(
+    variables: pd.DataFrame, workers: int | None = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Return repeated measures correlation and p-value of every pair of variables.
+
+    Countries (`geo`) are the subjects. Blocks of variables run on a process pool.
+    """
+    values = variables.to_numpy(dtype=np.float64)
+    subjects = pd.factorize(variables.index.get_level_values("geo"))[0]
+    blocks = np.array_split(np.arange(values.shape[1]), workers or os.cpu_count() or 1)
+    blocks = [block for block in blocks if len(block)]
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(values, subjects)
+    ) as pool:
+        sums = [np.concatenate(s) for s in zip(*pool.map(_within_subject_sums, blocks))]
+    cov, var_x, var_y, n_obs, n_subjects = sums
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+        dof = n_obs - n_subjects - 1
+        r[dof < 1] = np.nan
+        statistic = r * np.sqrt(dof / (1 - r**2))
+        pval = np.where(np.isnan(r), np.nan, 2 * student_t.sf(np.abs(statistic), dof))
+    np.fill_diagonal(r, 1.0)
+    np.fill_diagonal(pval, 1.0)  # As pandas `corr`: never significant, masked
+    columns = variables.columns
+    return (
+        pd.DataFrame(r, index=columns, columns=columns),
+        pd.DataFrame(pval, index=columns, columns=columns),
+    )
+
+
+def cluster(r: pd.DataFrame, distance: float = CLUSTER_DISTANCE) -> pd.Series:
+    """Return the cluster of every variable, in dendrogram leaves order.
+
+    Variables are linked on their correlation distance `1 - |r|`.
+    """
+    if len(r) < 2:
+        return pd.Series(1, index=r.index, name="cluster")
+    distances = 1 - r.abs().fillna(0).to_numpy()
+    np.fill_diagonal(distances, 0)
+    tree = linkage(squareform(distances, checks=False), method="average")
+    clusters = fcluster(tree, distance, "distance").astype(np.int64)
+    clusters = pd.Series(clusters, index=r.index)
+    return clusters.iloc[leaves_list(tree)].rename("cluster")
+
+
+def clustermap(variables: pd.DataFrame, workers: int | None = None) -> pd.DataFrame:
+    """Return correlation (`r`) and p-values (`pval`) of variables by cluster order.
+
+    Rows are indexed by (stat, cluster, variable), columns are variables.
+    """
+    r, pval = rm_correlation(mask_sparse_subjects(variables), workers)
+    clusters = cluster(r)
+    order = clusters.index
+    index = pd.MultiIndex.from_arrays(
+        [clusters.to_numpy(), order], names=["cluster", "variable"]
+    )
+    return pd.concat(
+        {
+            "r": r.loc[order, order].set_axis(index, axis=0),
+            "pval": pval.loc[order, order].set_axis(index, axis=0),
+        },
+        names=["stat"],
+    )
+
+
+def read_clustermap(path: str = CLUSTERING_PATH) -> pd.DataFrame | None:
+    """Return the stored clustermap or None if missing."""
+    found = os.path.exists(path)
+    record_read(path, found)
+    if not found:
+        return None
+    return pd.read_csv(path, index_col=["stat", "cluster", "variable"])
+
+
+def write_clustermap(clusters: pd.DataFrame, path: str = CLUSTERING_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    clusters.to_csv(f"{path}.tmp", compression="gzip")
+    os.replace(f"{path}.tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("codes", nargs="*", help="dataset codes to cluster")
+    parser.add_argument("--file", help="text file of more dataset codes, one per line")
+    parser.add_argument(
+        "--workers", type=int, help="processes to use (default: every CPU)"
+    )
+    args = parser.parse_args()
+    codes = list(args.codes)
+    if args.file:
+        with open(args.file) as file:
+            codes += [line.strip() for line in file if line.strip()]
+    if not codes:
+        parser.error("no dataset code given")
+
+    codelists = cached_codelists(get_cached_session())
+    datasets = {code: fetch_and_describe_dataset(code, codelists) for code in codes}
+    variables = wide_variables(datasets)
+    clusters = clustermap(variables, args.workers)
+    write_clustermap(clusters)
+    print(
+        f"{variables.shape[1]} variables in "
+        f"{clusters.index.get_level_values('cluster').nunique()} clusters "
+        f"stored in {CLUSTERING_PATH}."
+    )
+
+
+if __name__ == "__main__":
+    main()
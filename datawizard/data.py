@@ -1,25 +1,48 @@
 import gzip
 import io
 from datetime import timedelta
-from typing import Dict, List, Tuple
+from functools import reduce
+from typing import IO, Callable, Dict, Iterator, List, Tuple
 
 import eurostat
 import numpy as np
 import pandas as pd
 import pandasdmx as sdmx
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from pandas.api.types import union_categoricals
 import requests_cache
 
+from datawizard.cache import record_response
 from datawizard.definitions import CACHE_PATH
+from datawizard.store import (
+    read_codelist,
+    read_table_of_contents,
+    write_codelist,
+    write_table_of_contents,
+)
 from datawizard.utils import concat_keys_to_values, quote_sanitizer
 
 CODELIST_ENPOINT = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1/codelist/ESTAT/all?format=json&lang=en"
+DIMENSION_CODELIST_ENDPOINT = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1/codelist/ESTAT/{dimension}?format=json&lang=en"
 METABASE_ENDPOINT = (
     "https://ec.europa.eu/eurostat/api/dissemination/catalogue/metabase.txt.gz"
 )
+DATASET_ENDPOINT = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1/data/{code}?format=TSV&compressed=true"
+DATASET_FILTER_ENDPOINT = "https://ec.europa.eu/eurostat/api/dissemination/sdmx/2.1/data/{code}/{key}?format=TSV&compressed=true"
+PERIOD_PARAMETERS = ["startPeriod", "endPeriod"]
+# Ex: 2020, 2020-S1, 2020Q1, 2020-03, 2020M03D15, 2020-W05
+PERIOD_PATTERN = r"^(?P<year>\d{4})(?:-?(?P<freq>[SQMW])?(?P<period>\d{1,2}))?(?:-?D?(?P<day>\d{1,2}))?$"
+# Broader selections are filtered locally from the (stored) full dataset
+PARTIAL_FETCH_MAX_SERIES = 10_000
+PARTIAL_FETCH_MAX_KEY_LENGTH = 1_000
+GZIP_MAGIC_NUMBER = b"\x1f\x8b"
+# Periods already parsed by `cached_parse_periods`, shared among datasets
+_parsed_periods = pd.Series([], dtype="datetime64[ns]")
 
 
 def get_cached_session(caching_days: int = 7, fast_save=False):
-    return requests_cache.CachedSession(
+    session = requests_cache.CachedSession(
         cache_name=f"{CACHE_PATH}/sdmx",
         backend="sqlite",
         fast_save=fast_save,
@@ -27,6 +50,9 @@ def get_cached_session(caching_days: int = 7, fast_save=False):
         stale_if_error=True,
         stale_while_revalidate=True,
     )
+    # Count hits and misses, and track recently used responses for eviction
+    session.hooks["response"].append(record_response)
+    return session
 
 
 def eurostat_sdmx_request(caching_days: int = 7, fast_save=False):
@@ -46,19 +72,35 @@ def eurostat_sdmx_request(caching_days: int = 7, fast_save=False):
 
 
 def fetch_table_of_contents(caching_days: int = 7) -> pd.DataFrame:
-    """Returns dataset codes along various information about it."""
-    with requests_cache.enabled(
-        cache_name=f"{CACHE_PATH}/sdmx",
-        backend="sqlite",
-        expire_after=timedelta(days=caching_days),
-        stale_if_error=True,
-        stale_while_revalidate=True,
-    ):
-        return eurostat.get_toc_df().set_index("code").sort_index()
+    """Returns dataset codes along various information about it.
+
+    With `caching_days=0` the current table of contents is always downloaded.
+    """
+    if caching_days > 0:
+        with requests_cache.enabled(
+            cache_name=f"{CACHE_PATH}/sdmx",
+            backend="sqlite",
+            expire_after=timedelta(days=caching_days),
+            stale_if_error=True,
+            stale_while_revalidate=True,
+        ):
+            return eurostat.get_toc_df().set_index("code").sort_index()
+    return eurostat.get_toc_df().set_index("code").sort_index()
 
 
-def fetch_dataset(code: str, caching_days: int = 7) -> pd.DataFrame:
-    """Returns dataset found from eurostat"""
+def fetch_stored_table_of_contents(caching_days: int = 7) -> pd.DataFrame:
+    """Returns the table of contents, stored once downloaded for `caching_days`."""
+    toc = read_table_of_contents(timedelta(days=caching_days))
+    if toc is None:
+        toc = fetch_table_of_contents(caching_days)
+        write_table_of_contents(toc)
+    return toc
+
+
+def fetch_dataset(
+    code: str, caching_days: int = 7, filter_pars: Dict | None = None
+) -> pd.DataFrame:
+    """Returns dataset found from eurostat, optionally restricted by `filter_pars`"""
     with requests_cache.enabled(
         cache_name=f"{CACHE_PATH}/sdmx",
         backend="sqlite",
@@ -66,70 +108,495 @@ def fetch_dataset(code: str, caching_days: int = 7) -> pd.DataFrame:
         stale_if_error=True,
         stale_while_revalidate=True,
     ):
-        dataset = eurostat.get_data_df(code, flags=True)
+        dataset = eurostat.get_data_df(code, flags=True, filter_pars=filter_pars or {})
     dataset = dataset if dataset is not None else pd.DataFrame()
     return dataset
 
 
 def preprocess_dataset(df: pd.DataFrame) -> pd.DataFrame:
-    """Preprocess dataset by mangling it in a convenient DataFrame."""
-    df = df.rename(columns={"geo\\TIME_PERIOD": "geo"})
+    """Preprocess dataset by mangling it in a convenient DataFrame.
+
+    Wide `<time>_value` / `<time>_flag` columns are reshaped in a long-format with
+    `time` as last index level. Reshaping works on the underlying arrays: flags are
+    cleaned once per distinct value and empty cells are dropped before any long
+    structure is built.
+    """
+    df = df.rename(columns={"geo\\TIME_PERIOD": "geo"}, copy=False)
     indexes = df.columns[~df.columns.str.contains(r"value|flag")].tolist()
-    df = df.set_index(indexes)
-    values = df.filter(like="value")
-    values.columns = values.columns.str.replace("_value", "")
-    values.columns = pd.MultiIndex.from_product(
-        [["value"], values.columns.tolist()], names=[None, "time"]
+    value_columns = df.columns[df.columns.str.contains("value")]
+    flag_columns = df.columns[df.columns.str.contains("flag")]
+    flag_columns = dict(zip(flag_columns.str.replace("_flag", ""), flag_columns))
+    times = value_columns.str.replace("_value", "")
+    # Time is sorted as `stack` would do, flags are aligned to values
+    order = np.argsort(times.to_numpy(dtype=str), kind="stable")
+    times = times[order]
+    values = df[value_columns[order]].to_numpy()
+    if values.dtype == object:
+        values = pd.DataFrame(values).infer_objects().to_numpy()
+    # Flags are encoded one column at a time against the (few) distinct flags
+    flag_uniques = pd.Index([], dtype=object)
+    flag_codes = np.full(values.shape, -1, dtype=np.int32)
+    for i, time in enumerate(times):
+        if time in flag_columns:
+            column = df[flag_columns[time]]
+            flag_uniques = flag_uniques.append(
+                pd.Index(column.unique(), dtype=object).difference(flag_uniques)
+            )
+            flag_codes[:, i] = flag_uniques.get_indexer(column)
+    flag_uniques = flag_uniques.str.replace(":", "").str.strip()
+    # Last position is reserved to missing flags (code -1)
+    flag_lookup = np.append(
+        flag_uniques.where(flag_uniques != "", np.nan).to_numpy(dtype=object),
+        np.nan,
     )
-    flags = df.filter(like="flag")
-    flags.columns = flags.columns.str.replace("_flag", "")
-    flags.columns = pd.MultiIndex.from_product(
-        [["flag"], flags.columns.tolist()], names=[None, "time"]
+    rows, cols = np.nonzero(~(pd.isna(values) & pd.isna(flag_lookup)[flag_codes]))
+    levels, codes = [], []
+    for name in indexes:
+        level_codes, level = pd.factorize(df[name], sort=True)
+        levels.append(level)
+        codes.append(level_codes[rows])
+    index = pd.MultiIndex(
+        levels=levels + [times],
+        codes=codes + [cols],
+        names=indexes + ["time"],
+        verify_integrity=False,
     )
-    flags = flags.applymap(lambda s: s.replace(":", "").strip()).replace("", np.nan)
-    return pd.concat([values, flags], axis=1).stack("time", dropna=False)[["value", "flag"]].dropna(how="all", axis=0)  # type: ignore
+    # Explicit `dtype` prevents pandas from inferring types on every flag
+    return pd.DataFrame(
+        {
+            "value": pd.Series(values[rows, cols], index=index),
+            "flag": pd.Series(
+                flag_lookup[flag_codes[rows, cols]], index=index, dtype=object
+            ),
+        }
+    )
+
+
+def filter_pars(indexes: Dict[str, List]) -> Dict:
+    """Translate an `indexes` selection (see `filter_dataset`) in API filter parameters.
+
+    Codes are stripped of their descriptions and time is bounded by periods.
+    """
+    pars = {
+        dimension: [str(code).split(" | ")[0] for code in codes]
+        for dimension, codes in indexes.items()
+        if dimension != "time"
+    }
+    if "time" in indexes:
+        pars.update(zip(PERIOD_PARAMETERS, indexes["time"]))
+    return pars
+
+
+def series_key(filter_pars: Dict) -> str:
+    """Join dimension codes as a SDMX series key, ex: "A.PC.IT+FR".
+
+    Dimensions must follow the dataset order.
+    """
+    return ".".join(
+        "+".join(codes)
+        for dimension, codes in filter_pars.items()
+        if dimension not in PERIOD_PARAMETERS
+    )
+
+
+def is_narrow_filter(indexes: Dict[str, List]) -> bool:
+    """Whether downloading only the `indexes` selection of a dataset is worth it.
+
+    The count of selected series bounds the size of a partial download. Broad
+    selections are better served by the full dataset, shared by any selection.
+    """
+    pars = filter_pars(indexes)
+    n_series = np.prod(
+        [len(codes) for d, codes in pars.items() if d not in PERIOD_PARAMETERS]
+    )
+    return (
+        0 < n_series <= PARTIAL_FETCH_MAX_SERIES
+        and len(series_key(pars)) <= PARTIAL_FETCH_MAX_KEY_LENGTH
+    )
+
+
+def fetch_dataset_tsv(
+    code: str, session, refresh: bool = False, indexes: Dict | None = None
+) -> bytes | None:
+    """Returns dataset found from eurostat as a (still compressed) TSV.
+
+    None is returned when the dataset is not served synchronously as TSV.
+    Use `refresh` to skip any cached response and `indexes` to download only a
+    selection of it (see `filter_dataset`).
+    """
+    if indexes is None:
+        url, params = DATASET_ENDPOINT.format(code=code), None
+    else:
+        pars = filter_pars(indexes)
+        url = DATASET_FILTER_ENDPOINT.format(code=code, key=series_key(pars))
+        params = {p: pars[p] for p in PERIOD_PARAMETERS if p in pars}
+    resp = session.get(url, params=params, force_refresh=refresh)
+    resp.raise_for_status()
+    return resp.content if resp.content.startswith(GZIP_MAGIC_NUMBER) else None
+
+
+class SplitCellsReader(io.RawIOBase):
+    """Read a eurostat TSV while splitting keys and "<value> <flag>" cells in columns.
+
+    Commas only appear among keys of the first column and every cell holds a single
+    space, so both are translated in tab separators on the raw bytes.
+    """
+
+    SEPARATORS = bytes.maketrans(b", ", b"\t\t")
+
+    def __init__(self, file: IO[bytes]):
+        self.file = file
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(len(buffer)).translate(self.SEPARATORS)
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def read_dataset_tsv(
+    file: IO[bytes], blocksize: int = 2**24
+) -> Iterator[pd.DataFrame]:
+    """Yield a gzipped eurostat TSV by chunks of about `blocksize` bytes.
+
+    Decompression is streamed and every chunk is shaped as the output of
+    `eurostat.get_data_df(code, flags=True)`.
+    """
+    with gzip.open(file) as tsv:
+        header = tsv.readline().decode("utf-8").rstrip("\r\n").split("\t")
+        keys, times = header[0].split(","), [time.strip() for time in header[1:]]
+        values = [f"{time}_value" for time in times]
+        flags = [f"{time}_flag" for time in times]
+        reader = pa_csv.open_csv(
+            io.BufferedReader(SplitCellsReader(tsv)),  # type: ignore
+            read_options=pa_csv.ReadOptions(
+                column_names=keys + [c for pair in zip(values, flags) for c in pair],
+                block_size=blocksize,
+            ),
+            parse_options=pa_csv.ParseOptions(delimiter="\t"),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={
+                    **dict.fromkeys(keys, pa.string()),
+                    **dict.fromkeys(values, pa.float64()),
+                    # Few distinct flags: parsed straight as categoricals
+                    **dict.fromkeys(flags, pa.dictionary(pa.int32(), pa.string())),
+                },
+                null_values=[":", "0n", "n"],
+                strings_can_be_null=False,
+            ),
+        )
+        for batch in reader:
+            yield batch.to_pandas()
+
+
+def concat_datasets(datasets: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate datasets sharing the same index names and columns.
+
+    Index levels are merged once and codes remapped onto them, so that the index is
+    never rebuilt from its (many) values.
+    """
+    levels, codes = [], []
+    for i in range(datasets[0].index.nlevels):
+        level = reduce(pd.Index.union, (d.index.levels[i] for d in datasets))  # type: ignore
+        levels.append(level)
+        # Last position of the indexer keeps missing labels (code -1) as such
+        codes.append(
+            np.concatenate(
+                [
+                    np.append(level.get_indexer(d.index.levels[i]), -1)[d.index.codes[i]]  # type: ignore
+                    for d in datasets
+                ]
+            )
+        )
+    index = pd.MultiIndex(
+        levels=levels,
+        codes=codes,
+        names=datasets[0].index.names,
+        verify_integrity=False,
+    )
+    columns = {}
+    for column in datasets[0].columns:
+        values = [d[column] for d in datasets]
+        if isinstance(values[0].dtype, pd.CategoricalDtype):
+            # Categories are merged as well
+            columns[column] = pd.Series(
+                union_categoricals([v.values for v in values]), index=index
+            )
+        else:
+            columns[column] = pd.Series(
+                np.concatenate([v.to_numpy() for v in values]),
+                index=index,
+                dtype=values[0].dtype,
+            )
+    return pd.DataFrame(columns)
+
+
+def stack_datasets(datasets: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate datasets by code, as a `dataset` level of their index.
+
+    Index names are the sorted union of the datasets ones: a level missing from a
+    dataset is NaN on its rows. Datasets are concatenated at once, by level codes.
+    """
+    names = sorted({"dataset"}.union(*(d.index.names for d in datasets.values())))
+    aligned = []
+    for code, data in datasets.items():
+        index: pd.MultiIndex = data.index  # type: ignore
+        levels = dict(zip(index.names, index.levels))
+        codes = dict(zip(index.names, index.codes))
+        levels["dataset"], codes["dataset"] = pd.Index([code]), np.zeros(len(data))
+        missing = np.full(len(data), -1)
+        index = pd.MultiIndex(
+            levels=[levels.get(name, pd.Index([], dtype=object)) for name in names],
+            codes=[codes.get(name, missing) for name in names],
+            names=names,
+            verify_integrity=False,
+        )
+        aligned.append(data.set_axis(index, axis=0, copy=False))
+    return concat_datasets(aligned)
+
+
+def factorize_levels(
+    index: pd.MultiIndex, names: List[str], sort: bool = True
+) -> Tuple[pd.MultiIndex, np.ndarray]:
+    """Return the distinct combinations of `names` levels and the combination of every
+    row as their codes.
+
+    Combinations are sorted (missing labels first) or in order of appearance.
+    """
+    positions = [index.names.index(name) for name in names]
+    keys = np.zeros(len(index), dtype=np.int64)
+    for position in positions:
+        # Keys stay small: they are factorized again after every level
+        size = len(index.levels[position]) + 1
+        keys = keys * size + index.codes[position] + 1
+        keys = pd.factorize(keys, sort=sort)[0]
+    first = np.unique(keys, return_index=True)[1]
+    combinations = pd.MultiIndex(
+        levels=[index.levels[position] for position in positions],
+        codes=[index.codes[position][first] for position in positions],
+        names=names,
+        verify_integrity=False,
+    )
+    return combinations, keys
+
+
+def wide_format(
+    data: pd.DataFrame, max_dense_columns: int | None = None, min_density: float = 0.1
+) -> pd.DataFrame:
+    """Pivot `data` to a (flag | value, variable) column per variable of its index.
+
+    Rows are the remaining (geo, time) levels, as `data.unstack(variable levels)`.
+    Values of pivots wider than `max_dense_columns` and filled below `min_density`
+    are stored sparse, one column at a time: the dense pivot is never allocated.
+    """
+    index: pd.MultiIndex = data.index  # type: ignore
+    names = [name for name in index.names if name not in ("geo", "time")]
+    row_index, rows = factorize_levels(
+        index, [name for name in index.names if name in ("geo", "time")]
+    )
+    # As `unstack`: variables of many levels are in order of appearance
+    column_index, columns = factorize_levels(index, names, sort=len(names) == 1)
+    shape = (len(row_index), len(column_index))
+    flags = data["flag"].astype("category")
+    flag_codes = np.full(shape, -1, dtype=flags.cat.codes.dtype)
+    flag_codes[rows, columns] = flags.cat.codes.to_numpy()
+    values = data["value"].to_numpy(dtype=np.float64)
+    sparse = (
+        max_dense_columns is not None
+        and shape[1] > max_dense_columns
+        and len(data) < min_density * shape[0] * shape[1]
+    )
+    if sparse:
+        # Column by column, rows of every variable are contiguous once sorted
+        order = np.lexsort((rows, columns))
+        bounds = np.searchsorted(columns[order], np.arange(shape[1] + 1))
+        value_columns = {}
+        for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            column = np.full(shape[0], np.nan)
+            column[rows[order[start:end]]] = values[order[start:end]]
+            value_columns[shape[1] + i] = pd.arrays.SparseArray(column)
+        value_frame = pd.DataFrame(value_columns, index=row_index, copy=False)
+    else:
+        dense = np.full(shape, np.nan)
+        dense[rows, columns] = values
+        value_frame = pd.DataFrame(
+            dense, index=row_index, columns=shape[1] + np.arange(shape[1]), copy=False
+        )
+    flag_frame = pd.DataFrame(
+        {
+            i: pd.Categorical.from_codes(codes, dtype=flags.dtype)
+            for i, codes in enumerate(flag_codes.T)
+        },
+        index=row_index,
+        copy=False,
+    )
+    wide = pd.concat([flag_frame, value_frame], axis=1, copy=False)
+    wide.columns = pd.MultiIndex(
+        levels=[pd.Index(["flag", "value"])] + list(column_index.levels),
+        codes=[np.repeat([0, 1], shape[1])]
+        + [np.tile(codes, 2) for codes in column_index.codes],
+        names=[None] + names,
+        verify_integrity=False,
+    )
+    return wide
+
+
+def densify(wide: pd.DataFrame) -> pd.DataFrame:
+    """Return `wide` with its sparse columns (if any) as dense ones."""
+    sparse = [
+        c for c, dtype in wide.dtypes.items() if isinstance(dtype, pd.SparseDtype)
+    ]
+    return wide.astype({column: np.float64 for column in sparse}) if sparse else wide
 
 
 def fetch_and_preprocess_dataset(
     code: str,
+    blocksize: int = 2**24,
+    refresh: bool = False,
+    indexes: Dict | None = None,
 ) -> pd.DataFrame:
-    # TODO remove dependency from `eurostat_sdmx_request``
-    data = fetch_dataset(code)
-    data = None if data is None else preprocess_dataset(data)
-    return data  # type: ignore TODO Type checking fails
+    # Dataset is decompressed and preprocessed by chunks, bounding memory usage
+    tsv = fetch_dataset_tsv(code, get_cached_session(), refresh, indexes)
+    if tsv is None:
+        # Let `eurostat` handle datasets served asynchronously
+        pars = filter_pars(indexes) if indexes is not None else None
+        return preprocess_dataset(fetch_dataset(code, filter_pars=pars))
+    chunks = read_dataset_tsv(io.BytesIO(tsv), blocksize)
+    datasets = [preprocess_dataset(chunk) for chunk in chunks if not chunk.empty]
+    if not datasets:
+        raise ValueError(f"Dataset {code} has no data.")
+    return concat_datasets(datasets)
+
+
+def fetch_and_describe_dataset(
+    code: str,
+    codelists: Callable[[List[str]], pd.DataFrame],
+    refresh: bool = False,
+    indexes: Dict | None = None,
+) -> pd.DataFrame:
+    """Returns dataset by code in `long-format` (time as index), ready to be shown.
+
+    `codelists` returns the codelist of the given dimensions, only those found in
+    the dataset are requested. Only the `indexes` selection is downloaded, when
+    given (see `filter_dataset`).
+    """
+    data = fetch_and_preprocess_dataset(code, refresh=refresh, indexes=indexes)
+    data = cast_time_to_datetimeindex(data)
+    # `flag` is served with a different name in codelist
+    dimensions = [name for name in data.index.names if name != "time"]
+    data = append_code_descriptions(data, codelists([*dimensions, "obs_flag"]))
+    # `flag` shown before `value` to be near others filter key
+    return data[["flag", "value"]]
+
+
+def parse_periods(periods: pd.Index) -> pd.DatetimeIndex:
+    """Parse Eurostat periods as the date their period starts from.
+
+    Annual (2020), semi-annual (2020-S1), quarterly (2020-Q1), monthly (2020-03),
+    weekly (2020-W05) and daily (2020-03-15) periods are supported, with or without
+    dashes (ex: 2020M03, 2020M03D15). Periods are parsed at once, as columns.
+    """
+    parts = periods.astype(str).str.extract(PERIOD_PATTERN)
+    unknown = parts["year"].isna()
+    if unknown.any():
+        first = periods[unknown.to_numpy()][0]
+        raise ValueError(f"Cannot convert {first} into valid date.")
+    year = parts["year"].astype(int)
+    period = parts["period"].fillna(1).astype(int)
+    month = np.select(
+        [parts["freq"] == "S", parts["freq"] == "Q", parts["freq"] == "W"],
+        [(period - 1) * 6 + 1, (period - 1) * 3 + 1, 1],
+        period,
+    )
+    day = parts["day"].fillna(1).astype(int)
+    dates = pd.to_datetime(pd.DataFrame({"year": year, "month": month, "day": day}))
+    weekly = parts["freq"] == "W"
+    if weekly.any():
+        # ISO weeks start on monday
+        dates[weekly] = pd.to_datetime(
+            parts.loc[weekly, "year"] + "-W" + parts.loc[weekly, "period"] + "-1",
+            format="%G-W%V-%u",
+        )
+    return pd.DatetimeIndex(dates, name=periods.name)
+
+
+def cached_parse_periods(periods: pd.Index) -> pd.DatetimeIndex:
+    """Same as `parse_periods`, reusing periods already parsed for other datasets."""
+    global _parsed_periods
+    cache = _parsed_periods
+    dates = cache.reindex(periods)
+    missing = dates.isna().to_numpy()
+    if missing.any():
+        parsed = parse_periods(periods[missing])
+        dates[missing] = parsed
+        # Concurrent updates may overlap, labels are kept unique
+        cache = pd.concat([cache, pd.Series(parsed, index=periods[missing])])
+        _parsed_periods = cache[~cache.index.duplicated()]
+    return pd.DatetimeIndex(dates, name=periods.name)
 
 
 def cast_time_to_datetimeindex(data: pd.DataFrame):
-    time_levels = data.index.levels[data.index.names.index("time")]  # type: ignore
-    if len(str(time_levels[0])) == 4:
-        format = "%Y"
-    elif "M" in time_levels[0]:
-        format = "%YM%m"
-    elif "Q" in time_levels[0]:
-        raise NotImplementedError("Quarterly data not implemented yet.")
-    elif "W" in time_levels[0]:
-        raise NotImplementedError("Weekly data not implemented yet.")
-    else:  # NOTE This should never occured, according to date format specification
-        format = None
-    assert format, f"Cannot convert {time_levels[0]} into valid date."
-    time_index = pd.to_datetime(time_levels, format=format)
-    data.index = data.index.set_levels(time_index, level="time")  # type: ignore TODO Cannot access member
+    # Only distinct periods are parsed, rows keep their level codes
+    index: pd.MultiIndex = data.index  # type: ignore
+    position = index.names.index("time")
+    time_levels = index.levels[position]
+    if isinstance(time_levels, pd.DatetimeIndex):
+        return data
+    # Periods of different frequencies may start at the same date
+    codes, dates = pd.factorize(cached_parse_periods(time_levels), sort=True)
+    data.index = pd.MultiIndex(
+        levels=[*index.levels[:position], dates, *index.levels[position + 1 :]],
+        codes=[
+            *index.codes[:position],
+            np.append(codes, -1)[index.codes[position]],
+            *index.codes[position + 1 :],
+        ],
+        names=index.names,
+        verify_integrity=False,
+    )
+    index = data.index  # type: ignore
+    if index.is_monotonic_increasing:
+        return data
+    if all(level.is_monotonic_increasing for level in index.levels) and all(
+        (level_codes >= 0).all() for level_codes in index.codes
+    ):
+        # Rows follow level codes, sorting them is cheaper than `sort_index`
+        return data.take(np.lexsort(index.codes[::-1]))
     return data.sort_index()
 
 
-def append_code_descriptions(data: pd.DataFrame, codelist: pd.DataFrame):
-    cols_to_transform = data.index.names.difference(["time"]).union(["flag"])  # type: ignore
-    df = data.reset_index()
+def describe_codes(codes: pd.Index, codelist: pd.DataFrame, dimension: str) -> pd.Index:
+    """Label `codes` of a `dimension` as "code | description".
+
+    Codes missing from the codelist are kept as they are.
+    """
     code2level = codelist["code_label"]
-    for dimension in cols_to_transform:
-        if dimension == "flag":
-            # `flag` is served with a different name in codelist
-            code2description = quote_sanitizer(code2level.loc["obs_flag"]).to_dict()
-        else:
-            code2description = quote_sanitizer(code2level.loc[dimension]).to_dict()
-        code2code_pipe_description = concat_keys_to_values(code2description)
-        df[dimension] = df[dimension].map(code2code_pipe_description)
-    data = df.set_index(data.index.names)
+    if dimension not in code2level.index:
+        return codes
+    code2level = code2level.loc[dimension]
+    code2level = code2level[code2level.index.isin(codes)]
+    code2description = quote_sanitizer(code2level).to_dict()
+    code2code_pipe_description = concat_keys_to_values(code2description)
+    return codes.map(lambda code: code2code_pipe_description.get(code, code))
+
+
+def append_code_descriptions(data: pd.DataFrame, codelist: pd.DataFrame):
+    # Only distinct codes are relabelled (index levels and flag categories), rows
+    # and index codes are shared with the original dataset.
+    levels = [
+        level if name == "time" else describe_codes(level, codelist, name)
+        for name, level in zip(data.index.names, data.index.levels)  # type: ignore
+    ]
+    index = data.index.set_levels(levels, verify_integrity=False)  # type: ignore
+    data = data.set_axis(index, axis=0, copy=False)
+    # Few distinct flags are repeated on every row: store them as categories
+    # `flag` is served with a different name in codelist
+    flags = data["flag"].astype("category")
+    data["flag"] = flags.cat.rename_categories(
+        describe_codes(flags.cat.categories, codelist, "obs_flag")
+    )
     return data
 
 
@@ -138,26 +605,40 @@ def filter_dataset(
     indexes: Dict[str, List[str]],
     flags: list,
 ) -> pd.DataFrame:
-    # Using copies in order to leave the original untouched
-    dataset = dataset.copy()
-    indexes = dict(indexes)
-    start, end = indexes.pop("time")
-    complete_index = pd.MultiIndex.from_product(indexes.values(), names=indexes.keys())
-    # Make columns time-oriented for easy slicing
-    dataset = dataset.unstack("time").swaplevel(axis=1).sort_index(axis=1)  # type: ignore
-    dataset = dataset.loc[
-        dataset.index.intersection(complete_index),
-        str(start) : str(end),  # flake8: noqa
-    ].dropna(how="all")
-    if dataset.empty:
+    """Select `indexes` codes, a `time` range of years and `flags` of a dataset.
+
+    Masks are computed on the (few) distinct values of every level and spread to rows
+    through level codes, so the dataset is neither copied nor reshaped. Rows without
+    both flag and value are dropped, time is moved as last level of a sorted result.
+    """
+    index: pd.MultiIndex = dataset.index  # type: ignore
+    mask = dataset["flag"].notna().to_numpy() | dataset["value"].notna().to_numpy()
+    for name, selection in indexes.items():
+        position = index.names.index(name)
+        level = index.levels[position]
+        if name == "time":
+            start, end = selection
+            if isinstance(level, pd.DatetimeIndex):
+                selected = (level.year >= start) & (level.year <= end)
+            else:
+                selected = (level >= str(start)) & (level <= str(end))
+        else:
+            selected = level.isin(selection)
+        # Missing labels (code -1) are never selected
+        mask &= np.append(selected, False)[index.codes[position]]
+    if not mask.any():
         # TODO use pandas `orient=tight` syntax
         return pd.DataFrame(
             columns=["flag", "value"],
             index=pd.MultiIndex(levels=[[], []], codes=[[], []], names=["geo", "time"]),
         )
-    # Restore index orientation
-    dataset = dataset.stack("time")  # type: ignore
-    dataset = dataset.loc[dataset.flag.isin(flags)]
+    mask &= dataset["flag"].isin(flags).to_numpy()
+    dataset = dataset.loc[mask, ["flag", "value"]]
+    if index.names[-1] != "time":
+        names = [name for name in index.names if name != "time"] + ["time"]
+        dataset = dataset.reorder_levels(names)
+    if not dataset.index.is_monotonic_increasing:
+        dataset = dataset.sort_index()
     dataset.index = dataset.index.remove_unused_levels()  # type: ignore TODO Cannot access member
     return dataset
 
@@ -168,49 +649,49 @@ def fetch_codelist(session) -> Dict:
 
 
 def parse_codelist(json: Dict) -> pd.DataFrame:
-    df = pd.json_normalize(json)
-    df = df.explode(["link.item"])
-    df = df["link.item"].apply(pd.Series)
-    df = df.rename(columns={"label": "dimension_label"})
-    df = pd.concat(
-        [df[df.columns.difference(["extension"])], df["extension"].apply(pd.Series)],
-        axis=1,
-    )
-    df["category"] = df["category"].apply(pd.Series)["label"]
-    df["category"] = df["category"].apply(lambda d: d.items())
-    df = df.explode("category")
-    df["code"] = df["category"].str[0]
-    df["code_label"] = df["category"].str[1]
-    df = df.drop(columns="category")
-    df["id"] = df["id"].str.lower()
-    df = df.rename(columns={"id": "dimension"})
-    df = df.set_index(["dimension", "code"])[
-        ["dimension_label", "code_label"]
-    ].sort_index()
-    return df
+    # Rows are gathered straight from the JSON structure, one per dimension code
+    records = [
+        (item["extension"]["id"].lower(), code, item["label"], code_label)
+        for item in json["link"]["item"]
+        for code, code_label in item["category"]["label"].items()
+    ]
+    df = pd.DataFrame.from_records(
+        records, columns=["dimension", "code", "dimension_label", "code_label"]
+    )
+    return df.set_index(["dimension", "code"]).sort_index()
+
+
+def fetch_dimension_codelist(session, dimension: str) -> pd.DataFrame:
+    """Returns the parsed codelist of a single `dimension`, empty if not found."""
+    resp = session.get(DIMENSION_CODELIST_ENDPOINT.format(dimension=dimension.upper()))
+    if resp.status_code == 404:
+        return parse_codelist({"link": {"item": []}})
+    resp.raise_for_status()
+    # A single codelist is served as an item of the "all" collection
+    return parse_codelist({"link": {"item": [resp.json()]}})
+
+
+def fetch_parsed_codelist(session, caching_days: int = 7) -> pd.DataFrame:
+    """Returns the parsed codelist, stored once parsed for `caching_days`."""
+    codelist = read_codelist(timedelta(days=caching_days))
+    if codelist is None:
+        codelist = parse_codelist(fetch_codelist(session))
+        write_codelist(codelist)
+    return codelist
 
 
 def fetch_metabase(session) -> pd.DataFrame:
+    """Returns the metabase as (dataset, dimension, code) categorical columns.
+
+    Decompression is streamed by the parser, labels are stored once per category.
+    """
     resp = session.get(METABASE_ENDPOINT)
-    resp = gzip.decompress(resp.content)
-    data = resp.decode("utf-8")
     df = pd.read_csv(
-        io.StringIO(data),
+        io.BytesIO(resp.content),
+        compression="gzip",
         delimiter="\t",
         header=None,
         names=["dataset", "dimension", "code"],
+        dtype="category",
     )
     return df
-
-
-def metabase2datasets(metabase: pd.DataFrame, codelist: pd.DataFrame) -> pd.DataFrame:
-    metabase = metabase.set_index(["dimension", "code"])
-    metabase = metabase.join(codelist)
-    metabase = (
-        metabase.groupby(["code", "code_label", "dimension", "dimension_label"])[
-            "dataset"
-        ]
-        .apply(list)
-        .to_frame()
-    )
-    return metabase
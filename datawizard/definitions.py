@@ -3,3 +3,12 @@ import os
 LOGGING_FORMAT = "%(asctime)s %(levelname)s %(name)s - %(message)s"
 ROOT_PATH = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
 CACHE_PATH = os.path.join(ROOT_PATH, "cache")
+DATASETS_PATH = os.path.join(CACHE_PATH, "datasets")
+CODELIST_PATH = os.path.join(CACHE_PATH, "codelist.arrow")
+TOC_PATH = os.path.join(CACHE_PATH, "toc.arrow")
+DIMS_INDEX_PATH = os.path.join(CACHE_PATH, "dimension_index.npz")
+CLUSTERING_PATH = os.path.join(CACHE_PATH, "clustermap.csv.gz")
+HTTP_CACHE_PATH = os.path.join(CACHE_PATH, "sdmx.sqlite")
+CACHE_STATS_PATH = os.path.join(CACHE_PATH, "cache_stats.sqlite")
+# Size budget of the cache folder, see `datawizard.cache`
+CACHE_MAX_BYTES = int(float(os.environ.get("CACHE_MAX_MB", "4096")) * 2**20)
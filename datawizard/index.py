@@ -0,0 +1,172 @@
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Literal, Tuple
+
+import numpy as np
+import pandas as pd
+
+from datawizard.cache import record_read
+from datawizard.utils import is_file_fresh
+
+
+def factorize(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    # Sorted uniques as plain labels, whether `values` are categorical or not
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, pd.Index(np.asarray(uniques, dtype=object))
+
+
+def csr(
+    rows: np.ndarray, columns: np.ndarray, n_rows: int, n_columns: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (row, column) pairs as compressed sparse rows: offsets and columns.
+
+    Columns of row `i` are `columns[offsets[i] : offsets[i + 1]]`, sorted and unique.
+    """
+    # Sort pairs once: columns are then contiguous for every row
+    pairs = np.unique(rows.astype(np.int64) * n_columns + columns)
+    rows, columns = np.divmod(pairs, n_columns)
+    offsets = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=offsets[1:])
+    return offsets, columns.astype(np.int32)
+
+
+@dataclass
+class DatasetIndex:
+    """Inverted index of the datasets using every (dimension, code) of the metabase.
+
+    Datasets are identified by their position in `datasets`. Ids of the datasets
+    using the key at position `i` of `keys` are `ids[offsets[i] : offsets[i + 1]]`
+    (compressed sparse rows), sorted and unique.
+    """
+
+    keys: pd.MultiIndex
+    datasets: pd.Index
+    offsets: np.ndarray
+    ids: np.ndarray
+
+    @classmethod
+    def from_metabase(cls, metabase: pd.DataFrame) -> "DatasetIndex":
+        """Build the index of a metabase with dataset, dimension and code columns."""
+        dataset_ids, datasets = factorize(metabase["dataset"])
+        dimension_ids, dimensions = factorize(metabase["dimension"])
+        code_ids, codes = factorize(metabase["code"])
+        # Keys are sorted by dimension then code, as their integer combination
+        key_ids, keys = pd.factorize(
+            dimension_ids.astype(np.int64) * len(codes) + code_ids, sort=True
+        )
+        offsets, ids = csr(key_ids, dataset_ids, len(keys), len(datasets))
+        return cls(
+            keys=pd.MultiIndex(
+                levels=[dimensions, codes],
+                codes=[keys // len(codes), keys % len(codes)],
+                names=["dimension", "code"],
+                verify_integrity=False,
+            ),
+            datasets=pd.Index(datasets, name="dataset"),
+            offsets=offsets,
+            ids=ids,
+        )
+
+    def positions(self, keys, unique: bool = True) -> np.ndarray:
+        """Return the positions of the (dimension, code) `keys`, -1 if unknown."""
+        if len(keys) == 0:
+            return np.array([], dtype=np.intp)
+        positions = self.keys.get_indexer(pd.MultiIndex.from_tuples(keys))
+        return np.unique(positions) if unique else positions
+
+    def dataset_ids(self, positions: np.ndarray) -> np.ndarray:
+        """Return the dataset ids of every key at `positions`, concatenated."""
+        starts, ends = self.offsets[positions], self.offsets[positions + 1]
+        lengths = ends - starts
+        # Gather every slice at once: shift a global range by each slice start
+        shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.ids[shifts + np.arange(lengths.sum())]
+
+    def bitsets(self, positions: np.ndarray, rows: np.ndarray, n_rows: int):
+        """Return datasets using any key of each row as packed bitsets.
+
+        Keys at `positions` belong to the `rows` of `n_rows` bitsets.
+        """
+        known = positions >= 0
+        positions, rows = positions[known], rows[known]
+        ids = self.dataset_ids(positions)
+        rows = np.repeat(rows, self.offsets[positions + 1] - self.offsets[positions])
+        bits = np.zeros((n_rows, len(self.datasets)), dtype=bool)
+        bits[rows, ids] = True
+        return np.packbits(bits, axis=1)
+
+    def match(self, clauses) -> pd.Series:
+        """Return datasets using at least one key of every clause (AND of ORs).
+
+        Datasets are ranked by how many of the keys they use, most matching first.
+        """
+        clauses = [list(keys) for keys in clauses]
+        if not clauses:
+            return pd.Series([], index=self.datasets[:0], name="count", dtype=np.int64)
+        # Keys of every clause are looked up at once
+        positions = self.positions([key for keys in clauses for key in keys], False)
+        rows = np.repeat(np.arange(len(clauses)), [len(keys) for keys in clauses])
+        bitsets = self.bitsets(positions, rows, len(clauses))
+        matched = np.bitwise_and.reduce(bitsets, axis=0)
+        found = np.flatnonzero(np.unpackbits(matched, count=len(self.datasets)))
+        positions = np.unique(positions[positions >= 0])
+        counts = np.bincount(self.dataset_ids(positions), minlength=len(self.datasets))
+        counts = pd.Series(counts[found], index=self.datasets[found], name="count")
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def count(self, keys) -> pd.Series:
+        """Return how many of the `keys` every dataset uses, most matching first."""
+        return self.match([keys])
+
+    def query(self, keys, how: Literal["any", "all"] = "any") -> pd.Index:
+        """Return datasets using `any` or `all` of the `keys`."""
+        clauses = [keys] if how == "any" else [[key] for key in keys]
+        return self.match(clauses).index.sort_values()
+
+    def datasets_of(self, key) -> pd.Index:
+        """Return datasets using a single (dimension, code) `key`."""
+        positions = self.positions([key])
+        return self.datasets[self.dataset_ids(positions[positions >= 0])]
+
+    def save(self, path: str):
+        """Store the index as numpy arrays (npz), without pickled objects."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(
+                file,
+                dimensions=self.keys.levels[0].to_numpy(dtype=str),
+                codes=self.keys.levels[1].to_numpy(dtype=str),
+                dimension_ids=self.keys.codes[0],
+                code_ids=self.keys.codes[1],
+                datasets=self.datasets.to_numpy(dtype=str),
+                offsets=self.offsets,
+                ids=self.ids,
+            )
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path: str) -> "DatasetIndex":
+        with np.load(path) as arrays:
+            keys = pd.MultiIndex(
+                levels=[
+                    arrays["dimensions"].astype(object),
+                    arrays["codes"].astype(object),
+                ],
+                codes=[arrays["dimension_ids"], arrays["code_ids"]],
+                names=["dimension", "code"],
+                verify_integrity=False,
+            )
+            return cls(
+                keys=keys,
+                datasets=pd.Index(arrays["datasets"].astype(object), name="dataset"),
+                offsets=arrays["offsets"],
+                ids=arrays["ids"],
+            )
+
+
+def read_dataset_index(max_age: timedelta, path: str) -> DatasetIndex | None:
+    """Return the stored index or None if missing or older than `max_age`."""
+    fresh = is_file_fresh(path, max_age)
+    record_read(path, fresh)
+    return DatasetIndex.load(path) if fresh else None
@@ -0,0 +1,123 @@
+import functools
+import hashlib
+import json
+import sys
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+
+def size_of(value: Any) -> int:
+    """Return the memory used by `value` in bytes, objects referenced by pandas included."""
+    if isinstance(value, pd.MultiIndex):
+        # Levels and codes only: pandas would build the (large) lookup engine to tell
+        levels = sum(level.memory_usage(deep=True) for level in value.levels)
+        return int(levels + sum(codes.nbytes for codes in value.codes))
+    if isinstance(value, pd.Index):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, pd.DataFrame):
+        columns = value.memory_usage(index=False, deep=True).sum()
+        return int(columns + size_of(value.index))
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=False, deep=True) + size_of(value.index))
+    return sys.getsizeof(value)
+
+
+def fingerprint(value: Any) -> str:
+    """Return a short digest of `value` content, dicts compared regardless of order."""
+    content = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class MemoryCache:
+    """Results of some functions, least recently used evicted beyond `max_bytes`.
+
+    Results are shared rather than copied, callers must not modify them.
+    Concurrent calls with the same arguments wait for the first one to return.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = self.misses = self.evictions = 0
+        self._entries: OrderedDict[tuple, Tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._key_locks: Dict[tuple, Lock] = {}
+
+    def _get(self, key: tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key][0]
+
+    def _put(self, key: tuple, value: Any):
+        size = size_of(value)
+        with self._lock:
+            self.misses += 1
+            if size > self.max_bytes:
+                return  # Never kept, it would evict everything else
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def cached(self, function: Callable | None = None, *, key: Callable | None = None):
+        """Decorate `function` to cache its results by arguments.
+
+        Given `key`, results are cached by `key(*args, **kwargs)` instead: a cheaper
+        token of what the result depends on, like versions of the data it reads.
+        """
+        if function is None:
+            return functools.partial(self.cached, key=key)
+        name = function.__module__, function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            token = key(*args, **kwargs) if key else [args, kwargs]
+            entry = (*name, fingerprint(token))
+            found, value = self._get(entry)
+            if found:
+                return value
+            with self._lock:
+                key_lock = self._key_locks.setdefault(entry, Lock())
+            try:
+                with key_lock:
+                    found, value = self._get(entry)  # Computed while waiting
+                    if not found:
+                        value = function(*args, **kwargs)
+                        self._put(entry, value)
+            finally:
+                # Failing calls too, or a lock would be kept for every failing key
+                with self._lock:
+                    self._key_locks.pop(entry, None)
+            return value
+
+        wrapper.clear = functools.partial(self.clear, function)  # type: ignore
+        return wrapper
+
+    def clear(self, function: Callable | None = None):
+        """Forget results of `function`, or every result."""
+        name = function and (function.__module__, function.__qualname__)
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key[:2] == name:
+                    _, size = self._entries.pop(key)
+                    self._bytes -= size
+
+    def usage(self) -> dict:
+        """Return the number of entries and bytes held, with hits, misses and evictions."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,101 @@
+"""
+Download again stored datasets, but only the ones updated by Eurostat since then.
+Usage:
+
+    python -m datawizard.refresh [CODE ...]
+"""
+import argparse
+from functools import cache
+from typing import Callable, Iterable, List
+
+import pandas as pd
+
+from datawizard.cache import trim_cache
+from datawizard.data import (
+    fetch_and_describe_dataset,
+    fetch_dimension_codelist,
+    fetch_table_of_contents,
+    get_cached_session,
+)
+from datawizard.definitions import DATASETS_PATH
+from datawizard.store import stored_datasets, version_tag, write_dataset
+
+
+def refresh_datasets(
+    last_updates: pd.Series,
+    load: Callable[[str], pd.DataFrame],
+    codes: Iterable[str] | None = None,
+    path: str = DATASETS_PATH,
+) -> pd.DataFrame:
+    """Store again datasets whose stored version differs from the published one.
+
+    `last_updates` maps dataset codes to their "last update of data", as found in
+    the table of contents, while `load` downloads a dataset by code.
+    Return a report of `codes` (every stored dataset, by default) with their status
+    among `new`, `refreshed`, `up-to-date` and `unknown` (not published), the stored
+    and published version tags and the stored size in bytes.
+    """
+    stored = stored_datasets(path)
+    report = []
+    for code in stored.index if codes is None else codes:
+        tag = stored["tag"].get(code)
+        version = last_updates.get(code)
+        published = version_tag(version) if version else None
+        if published is None:
+            status = "unknown"
+        elif published == tag:
+            status = "up-to-date"
+        else:
+            write_dataset(code, version, load(code), path)  # type: ignore
+            status = "refreshed" if tag else "new"
+        report.append((code, status, tag, published))
+    report = pd.DataFrame.from_records(
+        report, columns=["code", "status", "stored", "published"], index="code"
+    )
+    report["bytes"] = stored_datasets(path)["bytes"].reindex(report.index)
+    return report
+
+
+def cached_codelists(session) -> Callable[[List[str]], pd.DataFrame]:
+    """Return a loader of the codelist of some dimensions, for a batch of datasets."""
+
+    # Datasets share most of their dimensions, codelists are parsed once
+    @cache
+    def codelist(dimension: str) -> pd.DataFrame:
+        return fetch_dimension_codelist(session, dimension)
+
+    def codelists(dimensions: List[str]) -> pd.DataFrame:
+        return pd.concat([codelist(dimension) for dimension in dimensions]).sort_index()
+
+    return codelists
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "codes", nargs="*", help="dataset codes (default: every stored dataset)"
+    )
+    args = parser.parse_args()
+
+    last_updates = fetch_table_of_contents(caching_days=0)["last update of data"]
+    codelists = cached_codelists(get_cached_session())
+    report = refresh_datasets(
+        last_updates,
+        lambda code: fetch_and_describe_dataset(code, codelists, refresh=True),
+        args.codes or None,
+    )
+    print(report.to_string())
+    # Stored files are uncompressed: their size is not the one of a download
+    kept = report.loc[report["status"] == "up-to-date", "bytes"].sum()
+    print(
+        f"{(report['status'] == 'refreshed').sum()} refreshed, "
+        f"{(report['status'] == 'new').sum()} new, "
+        f"{(report['status'] == 'up-to-date').sum()} up-to-date "
+        f"({kept / 2**20:.1f} MB of stored files kept as they are)."
+    )
+    evicted = trim_cache()
+    print(f"{len(evicted)} least recently used cache entries evicted.")
+
+
+if __name__ == "__main__":
+    main()
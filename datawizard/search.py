@@ -0,0 +1,77 @@
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from datawizard.index import csr
+
+# Whole words (codes like `ei_bsco_m` included) and their parts split on `_`
+WORD_PATTERN = r"\w+"
+PART_PATTERN = r"[^\W_]+"
+
+
+def tokenize(text: str) -> list:
+    """Return the lowercase words of `text`, as searched in a `SearchIndex`."""
+    return re.findall(WORD_PATTERN, text.lower())
+
+
+@dataclass
+class SearchIndex:
+    """Inverted index of the terms of some texts, searched by term prefixes.
+
+    Texts are identified by their position in `keys`. Ids of the texts containing
+    the term at position `i` of `terms` (sorted) are `ids[offsets[i] : offsets[i + 1]]`.
+    Terms sharing a prefix are contiguous, their ids a single slice of `ids`.
+    """
+
+    keys: pd.Index
+    terms: pd.Index
+    offsets: np.ndarray
+    ids: np.ndarray
+
+    @classmethod
+    def from_texts(cls, texts: pd.Series) -> "SearchIndex":
+        """Build the index of `texts`, identified by their index."""
+        lower = texts.fillna("").astype(str).str.lower().reset_index(drop=True)
+        words = pd.concat(
+            [lower.str.findall(WORD_PATTERN), lower.str.findall(PART_PATTERN)]
+        ).explode()
+        words = words[words.notna()]
+        term_ids, terms = pd.factorize(words.to_numpy(), sort=True)
+        offsets, ids = csr(term_ids, words.index.to_numpy(), len(terms), len(texts))
+        return cls(
+            keys=texts.index,
+            terms=pd.Index(terms, dtype=object),
+            offsets=offsets,
+            ids=ids,
+        )
+
+    def prefixed(self, token: str) -> slice:
+        """Return the slice of `ids` of every term starting with `token`."""
+        start = self.terms.searchsorted(token, side="left")
+        end = self.terms.searchsorted(token + "\U0010ffff", side="left")
+        return slice(self.offsets[start], self.offsets[end])
+
+    def search(self, query: str, limit: int | None = None) -> pd.Series:
+        """Return keys of texts containing every word of `query` as a prefix of their terms.
+
+        Texts are ranked by score, most matching first: every word counts 1,
+        plus 1 if it is a whole term of the text.
+        """
+        tokens = tokenize(query)
+        scores = np.zeros(len(self.keys), dtype=np.int64)
+        matched = np.ones(len(self.keys), dtype=bool)
+        for token in tokens:
+            hits = np.zeros(len(self.keys), dtype=bool)
+            hits[self.ids[self.prefixed(token)]] = True
+            matched &= hits
+            scores += hits
+            position = self.terms.searchsorted(token)
+            if position < len(self.terms) and self.terms[position] == token:
+                scores[
+                    self.ids[self.offsets[position] : self.offsets[position + 1]]
+                ] += 1
+        found = np.flatnonzero(matched) if tokens else np.array([], dtype=np.intp)
+        found = found[np.argsort(-scores[found], kind="stable")][:limit]
+        return pd.Series(scores[found], index=self.keys[found], name="score")
@@ -0,0 +1,155 @@
+import glob
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from datawizard.cache import record_read
+from datawizard.definitions import CODELIST_PATH, DATASETS_PATH, TOC_PATH
+from datawizard.utils import is_file_fresh
+
+
+def version_tag(version: str) -> str:
+    """Return a file-friendly tag of a Eurostat "last update of data" timestamp."""
+    return pd.to_datetime(version, utc=True).strftime("%Y%m%dT%H%M%S")
+
+
+def index_to_frame(index: pd.MultiIndex) -> pd.DataFrame:
+    """Return index levels as categorical columns, stored as Arrow dictionaries."""
+    return pd.DataFrame(
+        {
+            name: pd.Categorical.from_codes(codes, level)  # type: ignore
+            for name, codes, level in zip(index.names, index.codes, index.levels)
+        }
+    )
+
+
+def frame_to_index(frame: pd.DataFrame, names) -> pd.MultiIndex:
+    """Rebuild the index stored by `index_to_frame` in `names` columns."""
+    # Levels are reused from categoricals, without hashing labels again
+    return pd.MultiIndex(
+        levels=[frame[name].cat.categories for name in names],
+        codes=[frame[name].cat.codes for name in names],
+        names=list(names),
+        verify_integrity=False,
+    )
+
+
+def write_frame(frame: pd.DataFrame, filepath: str):
+    # Write aside and move in place, so that readers never see a partial file
+    frame.to_feather(f"{filepath}.tmp")
+    os.replace(f"{filepath}.tmp", filepath)
+
+
+def write_table(table: pa.Table, filepath: str):
+    # Uncompressed Arrow IPC file, that readers memory-map instead of loading it
+    with pa.OSFile(f"{filepath}.tmp", "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(f"{filepath}.tmp", filepath)
+
+
+def dataset_path(code: str, version: str, path: str = DATASETS_PATH) -> str:
+    """Return the file path of a dataset `code` at a given `version`.
+
+    `version` is the Eurostat "last update of data" timestamp of the dataset.
+    """
+    return os.path.join(path, f"{code}.{version_tag(version)}.arrow")
+
+
+def stored_datasets(path: str = DATASETS_PATH) -> pd.DataFrame:
+    """Return the version tag and the size in bytes of every stored dataset."""
+    filepaths = glob.glob(os.path.join(path, "*.*.arrow"))
+    return pd.DataFrame.from_records(
+        [(*os.path.basename(f).split(".")[:2], os.path.getsize(f)) for f in filepaths],
+        columns=["code", "tag", "bytes"],
+        index="code",
+    ).sort_index()
+
+
+def read_dataset(
+    code: str, version: str, path: str = DATASETS_PATH
+) -> pd.DataFrame | None:
+    """Return a stored dataset or None if this `version` was never stored.
+
+    The file is memory-mapped: index codes and values are read-only views of pages
+    shared by every process reading the same dataset, loaded on first access.
+    """
+    filepath = dataset_path(code, version, path)
+    found = os.path.exists(filepath)
+    record_read(filepath, found)
+    if not found:
+        return None
+    table = pa.ipc.open_file(pa.memory_map(filepath)).read_all()
+    frame = table.to_pandas(split_blocks=True)
+    index = frame_to_index(
+        frame, frame.columns.difference(["flag", "value"], sort=False)
+    )
+    return pd.DataFrame(
+        {
+            "flag": pd.Series(frame["flag"].values, index=index),
+            "value": pd.Series(frame["value"].to_numpy(), index=index),
+        },
+        copy=False,
+    )
+
+
+def write_dataset(
+    code: str, version: str, data: pd.DataFrame, path: str = DATASETS_PATH
+):
+    """Store a dataset in long-format, replacing any previous version of it."""
+    os.makedirs(path, exist_ok=True)
+    frame = index_to_frame(data.index)  # type: ignore
+    frame["flag"] = data["flag"].astype("category").values
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    # NaN are stored as floats rather than nulls, values are then mapped as they are
+    values = pa.array(data["value"].to_numpy(dtype=np.float64), from_pandas=False)
+    filepath = dataset_path(code, version, path)
+    write_table(table.append_column("value", values), filepath)
+    for outdated in glob.glob(os.path.join(path, f"{glob.escape(code)}.*.arrow")):
+        if outdated != filepath:
+            os.remove(outdated)
+
+
+def read_codelist(max_age: timedelta, path: str = CODELIST_PATH) -> pd.DataFrame | None:
+    """Return the stored codelist or None if missing or older than `max_age`."""
+    fresh = is_file_fresh(path, max_age)
+    record_read(path, fresh)
+    if not fresh:
+        return None
+    frame = pd.read_feather(path)
+    index = frame_to_index(frame, ["dimension", "code"])
+    return pd.DataFrame(
+        {
+            "dimension_label": pd.Series(frame["dimension_label"].values, index=index),
+            "code_label": pd.Series(frame["code_label"].values, index=index),
+        }
+    )
+
+
+def write_codelist(codelist: pd.DataFrame, path: str = CODELIST_PATH):
+    """Store a parsed codelist, indexed by dimension and code."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    frame = index_to_frame(codelist.index)  # type: ignore
+    frame["dimension_label"] = codelist["dimension_label"].to_numpy()
+    frame["code_label"] = codelist["code_label"].to_numpy()
+    write_frame(frame, path)
+
+
+def read_table_of_contents(
+    max_age: timedelta, path: str = TOC_PATH
+) -> pd.DataFrame | None:
+    """Return the stored table of contents or None if missing or older than `max_age`."""
+    fresh = is_file_fresh(path, max_age)
+    record_read(path, fresh)
+    if not fresh:
+        return None
+    return pd.read_feather(path).set_index("code")
+
+
+def write_table_of_contents(toc: pd.DataFrame, path: str = TOC_PATH):
+    """Store the table of contents, indexed by dataset code."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_frame(toc.reset_index(), path)
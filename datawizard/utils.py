@@ -1,5 +1,5 @@
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from json import JSONEncoder
 
 import numpy
@@ -54,6 +54,12 @@ def get_last_file_update(filepath: str) -> datetime | None:
     return None
 
 
+def is_file_fresh(filepath: str, max_age: timedelta) -> bool:
+    """Whether a file exists and was modified within `max_age`."""
+    last_update = get_last_file_update(filepath)
+    return last_update is not None and datetime.now() - last_update <= max_age
+
+
 def tuple2str(tuple, sep: str = " "):
     return sep.join([v for v in tuple if isinstance(v, str)])
 
@@ -0,0 +1,103 @@
+"""
+Prebuild the table of contents, the codelist, the dimension index and some datasets.
+Run it from cron or a container build step, so that the app starts warm.
+Usage:
+
+    python -m datawizard.warmup [--max-age DAYS] [--file FILE] [CODE ...]
+"""
+import argparse
+import os
+from datetime import timedelta
+from typing import Callable, Dict
+
+import pandas as pd
+
+from datawizard.cache import trim_cache
+from datawizard.data import (
+    fetch_and_describe_dataset,
+    fetch_codelist,
+    fetch_metabase,
+    fetch_table_of_contents,
+    get_cached_session,
+    parse_codelist,
+)
+from datawizard.definitions import CODELIST_PATH, DIMS_INDEX_PATH, TOC_PATH
+from datawizard.index import DatasetIndex
+from datawizard.refresh import cached_codelists, refresh_datasets
+from datawizard.store import write_codelist, write_table_of_contents
+from datawizard.utils import get_last_file_update, is_file_fresh
+
+
+def warm_files(
+    builders: Dict[str, Callable[[], None]], max_age: timedelta
+) -> pd.DataFrame:
+    """Run the builder of every file path missing or older than `max_age`.
+
+    Return a report of the paths with their status among `built` and `fresh`,
+    their last update and size in bytes.
+    """
+    report = []
+    for path, build in builders.items():
+        status = "fresh" if is_file_fresh(path, max_age) else "built"
+        if status == "built":
+            build()
+        report.append((path, status, get_last_file_update(path)))
+    report = pd.DataFrame.from_records(
+        report, columns=["path", "status", "updated"], index="path"
+    )
+    report["bytes"] = [os.path.getsize(path) for path in report.index]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("codes", nargs="*", help="dataset codes to store")
+    parser.add_argument(
+        "--file", help="text file of more dataset codes to store, one per line"
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=0,
+        metavar="DAYS",
+        help="keep files built within DAYS (default: 0, build everything again)",
+    )
+    args = parser.parse_args()
+    codes = list(args.codes)
+    if args.file:
+        with open(args.file) as file:
+            codes += [line.strip() for line in file if line.strip()]
+
+    max_age = timedelta(days=args.max_age)
+    session = get_cached_session()
+    toc = fetch_table_of_contents(caching_days=0)
+    with session.cache_disabled():  # Artifacts are built out of current data
+        report = warm_files(
+            {
+                TOC_PATH: lambda: write_table_of_contents(toc),
+                CODELIST_PATH: lambda: write_codelist(
+                    parse_codelist(fetch_codelist(session))
+                ),
+                DIMS_INDEX_PATH: lambda: DatasetIndex.from_metabase(
+                    fetch_metabase(session)
+                ).save(DIMS_INDEX_PATH),
+            },
+            max_age,
+        )
+    print(report.to_string())
+
+    if codes:
+        codelists = cached_codelists(session)
+        report = refresh_datasets(
+            toc["last update of data"],
+            lambda code: fetch_and_describe_dataset(code, codelists, refresh=True),
+            codes,
+        )
+        print(report.to_string())
+
+    evicted = trim_cache()
+    print(f"{len(evicted)} least recently used cache entries evicted.")
+
+
+if __name__ == "__main__":
+    main()
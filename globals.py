@@ -1,7 +1,14 @@
+import os
+
 import streamlit as st
 from datetime import datetime
 from datawizard.utils import get_last_file_update
-from datawizard.definitions import CACHE_PATH
+from datawizard.definitions import (
+    CLUSTERING_PATH,
+    CODELIST_PATH,
+    DIMS_INDEX_PATH,
+    TOC_PATH,
+)
 
 PAGE_ICON = "🇪🇺"
 LAYOUT = "wide"
@@ -15,14 +22,25 @@ MENU_ITEMS = {
             Copyright (c) 2022 Presidenza del Consiglio dei Ministri.  
             """
 }
-DIMS_INDEX_PATH = f"{CACHE_PATH}/dimension_index.pkl"
-CLUSTERING_PATH = f"{CACHE_PATH}/clustermap.csv.gz"
 MAX_VARIABLES_PLOT = 120
+MAX_DOWNLOAD_WORKERS = 8
+# Memory budget of the loaded datasets, codelists and stashes, see `load_dataset`
+MEMORY_CACHE_BYTES = int(float(os.environ.get("MEMORY_CACHE_MB", "2048")) * 2**20)
+# Opt-in download of the stashed selections only, see `load_stash`
+PARTIAL_FETCH = os.environ.get("PARTIAL_FETCH", "false").lower() == "true"
 
 
 def get_last_index_update() -> datetime | None:
     return get_last_file_update(DIMS_INDEX_PATH)
 
 
+def get_last_codelist_update() -> datetime | None:
+    return get_last_file_update(CODELIST_PATH)
+
+
+def get_last_toc_update() -> datetime | None:
+    return get_last_file_update(TOC_PATH)
+
+
 def get_last_clustering_update() -> datetime | None:
     return get_last_file_update(CLUSTERING_PATH)
@@ -1,73 +1,96 @@
 import streamlit as st
-import pandas as pd
 
+from globals import get_last_codelist_update, get_last_index_update
 from st_widgets.commons import (
     app_config,
     get_logger,
+    load_codes_search_index,
+    load_dataset_index,
     load_dimensions_and_codes,
-    load_metabase2datasets,
     reduce_multiselect_font_size,
+    show_freshness,
 )
 from st_widgets.console import session_console
-from st_widgets.stateful import stateful_data_editor
-from st_widgets.stateful.data_editor import _update_data
+from st_widgets.stateful import stateful_selectbox, stateful_text_input
 
 logging = get_logger(__name__)
 session = st.session_state
 app_config("Data Import")
 
-
-@st.cache_data
-def load_dimensions(metabase2datasets: pd.DataFrame) -> pd.Series:
-    # Return a series with dimensions code as index and descriptions as values.
-    return (
-        metabase2datasets.reset_index()[["dimension", "dimension_label"]]
-        .drop_duplicates()
-        .set_index("dimension")
-        .squeeze()
-        .sort_index()
-    )
+# Datasets must use at least one key of every clause
+QUERY_MODES = {
+    "any selected code": lambda keys: [keys],
+    "all selected codes": lambda keys: [[key] for key in keys],
+    "a selected code of every dimension": lambda keys: [
+        [key for key in keys if key[0] == dimension]
+        for dimension in dict.fromkeys(dimension for dimension, _ in keys)
+    ],
+}
 
 
 if __name__ == "__main__":
     reduce_multiselect_font_size()
     st.markdown(
-        """ Select only dimensions of interest to filter the dataset list in the `Data` page. Click anywhere in the table and type `CMD+F` or `CTRL+F` to search."""
+        """ Select only dimensions of interest to filter the dataset list in the `Data` page. Search codes by dimension, code or description words to narrow the table."""
+    )
+    index = load_dataset_index()
+    codes = load_dimensions_and_codes()
+    show_freshness(
+        {
+            "Dimension index": get_last_index_update(),
+            "Codelist": get_last_codelist_update(),
+        },
+        st.sidebar,
     )
-    meta = load_metabase2datasets()
-    codes = load_dimensions_and_codes(meta)
-    codes = codes.reset_index().assign(selected=False)
 
-    selected_codes = stateful_data_editor(
-        codes,
+    # Selected (dimension, code) keys are kept apart from the searched table
+    selected = {tuple(key) for key in session.get("_lookup_selected_keys", [])}
+    query = stateful_text_input("Search codes", key="_lookup_search")
+    shown = codes.loc[load_codes_search_index().search(query).index] if query else codes
+    shown_keys = shown.index.tolist()
+
+    # The table is built once per search: a table of other data would be a new
+    # widget, losing the edits made meanwhile. Edits apply to the selection it shows
+    if session.get("_lookup_table_query") != query:
+        session["_lookup_table_query"] = query
+        session["_lookup_table_selected"] = [key in selected for key in shown_keys]
+    edited = st.data_editor(
+        shown.reset_index().assign(selected=session["_lookup_table_selected"]),
         disabled=["code", "dimension", "description"],
         use_container_width=True,
-        key="_selected_codes",
-        multiedit=True,
-    )
-    selected_codes_mask = (
-        codes["selected"].values
-        if "_selected_codes_data" not in session
-        else session["_selected_codes_data"]["selected"].values
+        key=f"_lookup_editor.{query}",
     )
+    checked = edited["selected"].to_numpy()
+    selected.difference_update(shown_keys)
+    selected.update(key for key, check in zip(shown_keys, checked) if check)
+    session["_lookup_selected_keys"] = sorted(selected)
 
     st.markdown("Selected dimension overview:")
 
     def reset_selected_codes():
-        del session[f"_selected_codes_data"]
+        session["_lookup_selected_keys"] = []
+        session.pop("_lookup_table_query", None)  # Built again, unselected
+        session.pop(f"_lookup_editor.{query}", None)  # Without its edits
 
     st.button("Reset", on_click=reset_selected_codes)
 
-    selected_datasets_by_code = meta.reset_index()[selected_codes_mask]
+    selected_codes = codes[codes.index.isin(list(selected))].reset_index()
+    selected_keys = list(zip(selected_codes["dimension"], selected_codes["code"]))
     st.dataframe(
-        selected_datasets_by_code[
-            ["dimension", "dimension_label", "code", "code_label", "dataset"]
-        ],
+        selected_codes[["dimension", "code", "description"]].assign(
+            dataset=[index.datasets_of(key).tolist() for key in selected_keys]
+        ),
         hide_index=False,
         use_container_width=True,
     )
 
-    dataset_counts = selected_datasets_by_code["dataset"].explode().value_counts()
+    query_mode = stateful_selectbox(
+        label="Datasets containing",
+        options=list(QUERY_MODES),
+        key="_lookup_query_mode",
+        position=st.sidebar,
+    )
+    dataset_counts = index.match(QUERY_MODES[query_mode](selected_keys))
     st.sidebar.dataframe(dataset_counts)
 
     session["lookup_datasets"] = (
@@ -4,24 +4,25 @@ import streamlit as st
 from datawizard.data import (
     fetch_codelist,
     fetch_metabase,
-    fetch_table_of_contents,
+    fetch_stored_table_of_contents,
     get_cached_session,
-    metabase2datasets,
     parse_codelist,
 )
+from datawizard.search import SearchIndex
+from globals import get_last_toc_update
 from st_widgets.commons import (
     app_config,
     get_logger,
-    global_download_lock,
-    load_codelist,
-    load_dataset,
+    download_lock,
+    load_dataset_filters,
     reduce_multiselect_font_size,
+    show_freshness,
 )
 from st_widgets.console import session_console
 from st_widgets.stateful import (
     stateful_multiselect,
-    stateful_selectbox,
     stateful_slider,
+    stateful_text_input,
 )
 
 logging = get_logger(__name__)
@@ -36,8 +37,8 @@ def load_toc() -> pd.Series | None:
     try:
         with st.sidebar:
             with st.spinner(text="Fetching table of contents"):
-                with global_download_lock():
-                    toc = fetch_table_of_contents()
+                with download_lock("toc"):
+                    toc = fetch_stored_table_of_contents()
                     # TODO Derived dataset are not found:
                     # HTTPError: 404 Client Error: Not Found for url: ...
                     toc = toc[~toc.index.str.contains("$", regex=False)]
@@ -47,55 +48,97 @@ def load_toc() -> pd.Series | None:
         st.sidebar.error(e)
 
 
+@st.cache_resource
+def load_toc_labels() -> dict:
+    # Precomputed option labels, ex: key: EI_BSCO_M - value: EI_BSCO_M | Consumers ...
+    # Read-only and shared: reruns format options without any pandas indexing
+    toc = load_toc()
+    return dict(zip(toc.index, toc.index + " | " + toc))  # type: ignore
+
+
+@st.cache_resource
+def load_toc_search_index() -> SearchIndex:
+    # Search datasets by code and title words
+    toc = load_toc()
+    return SearchIndex.from_texts(toc.index + " " + toc)  # type: ignore
+
+
+def search_datasets(options: list) -> list:
+    # Narrow `options` to the datasets matching the search, best matching first
+    query = stateful_text_input("Search datasets", key="_dataset_search")
+    if not query:
+        return options
+    found = load_toc_search_index().search(query).index
+    found = found[found.isin(options)].tolist()
+    if not found:
+        st.warning(f"No dataset matching `{query}`")
+        return options
+    return found
+
+
+def select_dataset(label: str, options: list, labels: dict) -> str | None:
+    # The selection is kept by code: a search changes the options, and the widget
+    # with them, never the selected dataset. Filtered out, nothing is selected
+    selected = session.get("_selected_dataset_code")
+    options = [None] + options
+    key = f"_selected_dataset.{hash(tuple(options))}"
+
+    def _remember_selection():
+        session["_selected_dataset_code"] = session[key]
+
+    return st.selectbox(
+        label=label,
+        options=options,
+        index=options.index(selected) if selected in options else 0,
+        format_func=lambda code: "-" if code is None else labels.get(code, code),
+        key=key,
+        on_change=_remember_selection,
+    )
+
+
 def save_datasets_to_stash():
     toc = load_toc()
 
     # Datasets search criteria
     if toc is not None:
+        show_freshness({"Table of contents": get_last_toc_update()}, st.sidebar)
         with st.sidebar:
             using_lookup = "lookup_datasets" in session and session["lookup_datasets"]
-            dataset_code = stateful_selectbox(
-                label=f"Select dataset {'from `lookup` page ' if using_lookup else ''}(type to search)",
-                options=session["lookup_datasets"]
-                if using_lookup
-                else toc.index.tolist(),
-                format_func=lambda i: i + " | " + toc.loc[i],
-                key="_selected_dataset",
+            labels = load_toc_labels()
+            options = search_datasets(
+                session["lookup_datasets"] if using_lookup else list(labels)
+            )
+            dataset_code = select_dataset(
+                f"Select dataset {'from `lookup` page ' if using_lookup else ''}(type to search)",
+                options,
+                labels,
             )
 
+        # Dataset filtering criteria
+        if dataset_code is not None:
             # Create or reuse a filtering history for this code
             if dataset_code not in session["history"]:
                 session["history"][dataset_code] = dict()
             history = session["history"][dataset_code]
             history["stash"] = True
 
-        # Dataset filtering criteria
-        if dataset_code is not None:
             st.subheader(
-                f"Variable selection: {dataset_code + ' | ' + toc.loc[dataset_code]}"
+                f"Variable selection: {labels.get(dataset_code, dataset_code)}"
             )
 
-            codelist = load_codelist()
-            dataset = load_dataset(dataset_code, codelist)
+            # Without a full download of the dataset, if partial fetch is enabled
+            indexes, flags = load_dataset_filters(dataset_code)
 
             # Flags filtering handles
-            flags = dataset.flag.fillna("<NA>").unique().tolist()
             history["flags"] = stateful_multiselect(
                 "Select FLAG", flags, default=flags, key=f"_{dataset_code}.flags"
             )
 
             # Indexes filtering handles (all the available dimensions)
-            indexes = {n: dataset.index.levels[i].to_list() for i, n in enumerate(dataset.index.names)}  # type: ignore
-            if "time" in indexes:
-                indexes["time"] = [
-                    min(indexes["time"]).year,
-                    max(indexes["time"]).year,
-                ]
-
             if "indexes" not in history:
                 history["indexes"] = dict()
 
-            for name in dataset.index.names:
+            for name in indexes:
                 if name == "time":
                     codes_dims, M = indexes["time"][0], indexes["time"][1]
                     M = M if codes_dims < M else M + 1  # RangeError fix
@@ -1,7 +1,13 @@
 import pandas as pd
 import streamlit as st
 
-from st_widgets.commons import app_config, load_stash, read_stash_from_history
+from datawizard.data import densify
+from st_widgets.commons import (
+    app_config,
+    load_stash,
+    load_wide_stash,
+    read_stash_from_history,
+)
 from st_widgets.console import session_console
 from st_widgets.dataframe import (
     empty_eurostat_dataframe,
@@ -54,11 +60,12 @@ def show_stash():
             )
 
         stash = read_stash_from_history(history)
-        dataset = empty_eurostat_dataframe()
+        dataset = wide = empty_eurostat_dataframe()
 
         try:
             with st.spinner(text="Fetching data"):
                 dataset = load_stash(stash)
+                wide = load_wide_stash(stash)
         except ValueError as ve:
             st.error(ve)
 
@@ -72,18 +79,18 @@ def show_stash():
         with tab2:
             n_flags, n_values = 0, 0
 
-            if not dataset.empty:
-                dataset = dataset.unstack(dataset.index.names.difference(["geo", "time"]))  # type: ignore
-                n_flags, n_values = dataset["flag"].shape[1], dataset["value"].shape[1]
-                levels = list(range(len(dataset.columns.names)))
-                dataset = dataset.reorder_levels(
-                    levels[1:] + levels[:1], axis=1  # type: ignore
-                ).sort_index(
-                    axis=1
+            if not wide.empty:
+                n_flags, n_values = wide["flag"].shape[1], wide["value"].shape[1]
+                levels = list(range(len(wide.columns.names)))
+                # Sparse values are shown as dense ones
+                wide = (
+                    densify(wide)
+                    .reorder_levels(levels[1:] + levels[:1], axis=1)  # type: ignore
+                    .sort_index(axis=1)
                 )  # Move flag, value as last index
 
             view = st_dataframe_with_index_and_rows_cols_count(
-                dataset, show_shape=False, use_container_width=True  # type: ignore
+                wide, show_shape=False, use_container_width=True  # type: ignore
             )
             st.write(
                 "{} rows x {} columns ({} flags, {} values)".format(
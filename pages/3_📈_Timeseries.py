@@ -4,7 +4,7 @@ from plotly.subplots import make_subplots
 
 from datawizard.utils import trim_code, tuple2str
 from globals import MAX_VARIABLES_PLOT
-from st_widgets.commons import app_config, load_stash, read_stash_from_history
+from st_widgets.commons import app_config, load_wide_stash, read_stash_from_history
 from st_widgets.console import session_console
 from st_widgets.dataframe import empty_eurostat_dataframe
 from st_widgets.stateful import stateful_number_input
@@ -18,7 +18,7 @@ def plot_column_idx(df, i, annotate=False):
         color=df.index.get_level_values("geo"),
         x=df.index.get_level_values("time"),
         y=df["value"].iloc[:, i],
-        hover_name=df["flag"].iloc[:, i].fillna(""),
+        hover_name=df["flag"].iloc[:, i].astype(object).fillna(""),
         labels=dict(x="Time", y="Value", geo="Country"),
         markers=True,
         text=df.index.get_level_values("geo") if annotate else None,
@@ -33,7 +33,9 @@ if __name__ == "__main__":
     try:
         with st.spinner(text="Fetching data"):
             if "history" in st.session_state:
-                stash = load_stash(read_stash_from_history(st.session_state.history))
+                stash = load_wide_stash(
+                    read_stash_from_history(st.session_state.history)
+                )
             else:
                 st.warning("No stash found. Select some data to plot.")
     except ValueError as ve:
@@ -48,7 +50,6 @@ if __name__ == "__main__":
     if stash.empty:
         st.warning("No stash found. Select some data to plot.")
     else:
-        stash = stash.unstack(stash.index.names.difference(["geo", "time"]))  # type: ignore
         n_variables = len(stash["value"].columns)
         if (
             n_variables <= MAX_VARIABLES_PLOT
@@ -10,9 +10,16 @@ import streamlit as st
 from matplotlib.colors import LinearSegmentedColormap
 from pingouin import rm_corr
 
+from datawizard.clustering import mask_sparse_subjects, read_clustermap, variable_names
 from datawizard.utils import trim_code, tuple2str
-from globals import MAX_VARIABLES_PLOT
-from st_widgets.commons import app_config, load_stash, read_stash_from_history
+from globals import MAX_VARIABLES_PLOT, get_last_clustering_update
+from st_widgets.commons import (
+    app_config,
+    is_stash_unfiltered,
+    load_wide_stash,
+    read_stash_from_history,
+    show_freshness,
+)
 from st_widgets.console import session_console
 from st_widgets.dataframe import empty_eurostat_dataframe
 from st_widgets.stateful import stateful_number_input, stateful_slider
@@ -53,6 +60,22 @@ def compute_correlation(df: pd.DataFrame):
     return corr, pval
 
 
+@st.cache_data()
+def load_clustermap(last_update) -> pd.DataFrame | None:
+    # Precomputed by `datawizard.clustering`, read again once rebuilt
+    return read_clustermap()
+
+
+def precomputed_correlation(clusters: pd.DataFrame, variables: list):
+    # Correlations of `variables` in cluster order, along their cluster
+    order = clusters.loc["r"].index
+    order = order[order.get_level_values("variable").isin(variables)]
+    names = order.get_level_values("variable")
+    corr = clusters.loc["r"].loc[order, names].droplevel("cluster")
+    pval = clusters.loc["pval"].loc[order, names].droplevel("cluster")
+    return corr, pval, order.get_level_values("cluster").to_numpy()
+
+
 def OrBu():
     colors = [
         (1.0, 0.7, 0.0),  # Orange (#cc7a00)
@@ -64,7 +87,12 @@ def OrBu():
     return LinearSegmentedColormap.from_list("OrBu", colors)
 
 
-def plot_heatmap(corr: pd.DataFrame, figsize: Tuple[int, int] = (18, 16)):
+def plot_heatmap(
+    corr: pd.DataFrame,
+    figsize: Tuple[int, int] = (18, 16),
+    row_groups: np.ndarray | None = None,
+    col_groups: np.ndarray | None = None,
+):
     fig, ax = plt.subplots(figsize=figsize, dpi=150)
     plt.title("Correlation heatmap")
     ax = sns.heatmap(
@@ -77,26 +105,33 @@ def plot_heatmap(corr: pd.DataFrame, figsize: Tuple[int, int] = (18, 16)):
         ax=ax,
     )
     ax.set_facecolor("white")  # Background color (hence, NaN color)
+    # Separate clusters of variables
+    if row_groups is not None:
+        for boundary in np.flatnonzero(np.diff(row_groups)) + 1:
+            ax.axhline(boundary, color="black", linewidth=1.5)
+    if col_groups is not None:
+        for boundary in np.flatnonzero(np.diff(col_groups)) + 1:
+            ax.axvline(boundary, color="black", linewidth=1.5)
     ax.set_xticklabels(ax.get_xticklabels(), rotation=45, horizontalalignment="right")
     return fig, ax
 
 
 if __name__ == "__main__":
-    stash = empty_eurostat_dataframe()
+    stash, stashed = empty_eurostat_dataframe(), dict()
     try:
         with st.spinner(text="Fetching data"):
             if "history" in st.session_state:
-                stash = load_stash(read_stash_from_history(st.session_state.history))
+                stashed = read_stash_from_history(st.session_state.history)
+                stash = load_wide_stash(stashed)
             else:
                 st.warning("No stash found. Select some data to plot.")
     except ValueError as ve:
         st.error(ve)
 
+    show_freshness({"Clustering": get_last_clustering_update()}, st.sidebar)
     if stash.empty:
         st.warning("No stash found. Select some data to plot.")
     else:
-        stash = stash.unstack(stash.index.names.difference(["geo", "time"]))  # type: ignore
-
         # Flags warning
         flags = set(np.unique(stash["flag"].astype(str)))
         flags.remove("nan")
@@ -131,16 +166,35 @@ if __name__ == "__main__":
         if (
             n_variables <= MAX_VARIABLES_PLOT
         ):  # TODO Totally arbitrary threshold, can be inferred?
-            not_enough_datapoints = (
-                stash.groupby("geo").transform(lambda c: c.count()) < 2
+            labels = pd.Index(
+                [
+                    tuple2str(map(trim_code, i), " • ")
+                    for i in stash.columns.to_flat_index()
+                ]
             )
-            stash = stash.mask(not_enough_datapoints)
-            stash.columns = [
-                tuple2str(map(trim_code, i), " • ")
-                for i in stash.columns.to_flat_index()
-            ]
-            stash.columns = stash.columns.str.replace(" • ", "\n").str.replace(", ", "\n")  # type: ignore
-            scores, pvals = compute_correlation(stash)  # type: ignore
+            labels = labels.str.replace(" • ", "\n").str.replace(", ", "\n")
+            variables = variable_names(stash.columns)  # type: ignore
+            clusters = load_clustermap(get_last_clustering_update())
+            groups = None
+            if clusters is not None and set(variables) <= set(clusters.columns):
+                # Ordered and grouped out of the clustering job
+                scores, pvals, groups = precomputed_correlation(clusters, variables)
+                if not is_stash_unfiltered(stashed):
+                    # Precomputed on every country, year and flag: only the order
+                    # is kept, correlations are computed on the filtered stash
+                    st.caption(
+                        "Variables ordered by the precomputed clustering, "
+                        "correlations computed on the filtered stash."
+                    )
+                    stash = mask_sparse_subjects(stash).set_axis(variables, axis=1)
+                    scores, pvals = compute_correlation(stash[scores.index])  # type: ignore
+                labels = dict(zip(variables, labels))
+                scores = scores.rename(index=labels, columns=labels)
+                pvals = pvals.rename(index=labels, columns=labels)
+            else:
+                stash = mask_sparse_subjects(stash)
+                stash.columns = labels
+                scores, pvals = compute_correlation(stash)  # type: ignore
             scores = scores.mask(pvals > pval_threshold)
 
             with st.sidebar:
@@ -160,7 +214,12 @@ if __name__ == "__main__":
                 )
             scores = scores.iloc[trim_h[0] : trim_h[1], trim_w[0] : trim_w[1]]
 
-            f, ax = plot_heatmap(scores, figsize=(int(fig_w), int(fig_h)))
+            f, ax = plot_heatmap(
+                scores,
+                figsize=(int(fig_w), int(fig_h)),
+                row_groups=None if groups is None else groups[trim_h[0] : trim_h[1]],
+                col_groups=None if groups is None else groups[trim_w[0] : trim_w[1]],
+            )
             with io.BytesIO() as buffer:
                 f.savefig(buffer, bbox_inches="tight")
                 buffer.seek(0)
@@ -1,24 +1,50 @@
 import logging
 import os
-from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock, current_thread
+from typing import Callable, Dict, Iterable, Tuple
 
 import pandas as pd
 import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
+from datawizard.cache import cache_stats, trim_cache
 from datawizard.data import (
-    append_code_descriptions,
-    cast_time_to_datetimeindex,
-    fetch_codelist,
-    fetch_and_preprocess_dataset,
+    describe_codes,
+    fetch_and_describe_dataset,
+    fetch_dimension_codelist,
     fetch_metabase,
+    fetch_parsed_codelist,
+    fetch_stored_table_of_contents,
     get_cached_session,
-    metabase2datasets,
-    parse_codelist,
+    is_narrow_filter,
+    stack_datasets,
+    wide_format,
 )
 from datawizard.definitions import LOGGING_FORMAT
-from globals import INITIAL_SIDEBAR_STATE, LAYOUT, MENU_ITEMS, PAGE_ICON
+from datawizard.index import DatasetIndex, read_dataset_index
+from datawizard.memory import MemoryCache, fingerprint
+from datawizard.search import SearchIndex
+from datawizard.store import dataset_path, read_dataset, write_dataset
+from globals import (
+    DIMS_INDEX_PATH,
+    INITIAL_SIDEBAR_STATE,
+    LAYOUT,
+    MAX_DOWNLOAD_WORKERS,
+    MAX_VARIABLES_PLOT,
+    MEMORY_CACHE_BYTES,
+    MENU_ITEMS,
+    PAGE_ICON,
+    PARTIAL_FETCH,
+)
 from st_widgets.dataframe import empty_eurostat_dataframe, filter_dataset_replacing_NA
 
+# Datasets, codelists and stashes of every session share a byte budget: results
+# are measured once stored and the least recently used are evicted first
+memory_cache = MemoryCache(MEMORY_CACHE_BYTES)
+
 
 def app_config(title: str):
     """Setup page & session state. Must be the first script instruction called."""
@@ -55,81 +81,297 @@ def get_logger(name: str):
     return logger
 
 
+def show_freshness(
+    last_updates: Dict[str, datetime | None], position: DeltaGenerator = st._main
+):
+    # Tell when the stored files a page relies on were built, see `datawizard.warmup`
+    position.caption(
+        " • ".join(
+            f"{name} of {when:%Y-%m-%d %H:%M}" if when else f"{name} not stored yet"
+            for name, when in last_updates.items()
+        )
+    )
+
+
 @st.cache_resource
-def global_download_lock():
-    """Lock any further execution of downloading."""
+def download_lock(key: str):
+    """Lock any further download of the same resource (ex: a dataset code).
+    Downloads of different resources proceed in parallel."""
     return Lock()
 
 
 @st.cache_data()
-def load_metabase2datasets() -> pd.DataFrame:
-    # Return an index of code + dimension and a list of datasets using them
-    req = get_cached_session()
-    metabase = fetch_metabase(req)
-    codelist = parse_codelist(fetch_codelist(req))
-    return metabase2datasets(metabase, codelist)
+def load_dataset_index() -> DatasetIndex:
+    # Return an inverted index of the datasets using every dimension code
+    index = read_dataset_index(timedelta(days=7), DIMS_INDEX_PATH)
+    if index is None:
+        index = DatasetIndex.from_metabase(fetch_metabase(get_cached_session()))
+        index.save(DIMS_INDEX_PATH)
+    return index
 
 
 @st.cache_data()
-def load_dimensions_and_codes(metabase2datasets: pd.DataFrame) -> pd.Series:
-    # Arrage metabase as an index of dimensions + descriptions
-    codes_dims = metabase2datasets.reset_index()[
-        ["dimension", "code", "dimension_label", "code_label"]
-    ].set_index(["dimension", "code"])
-    codes_dims = codes_dims["dimension_label"].str.cat(
-        codes_dims["code_label"], sep=": "
-    )
+def load_dimensions_and_codes() -> pd.Series:
+    # Describe every dimension + code used by datasets, when found in codelist
+    codelist = fetch_parsed_codelist(get_cached_session())
+    codelist = codelist[codelist.index.isin(load_dataset_index().keys)]
+    codes_dims = codelist["dimension_label"].str.cat(codelist["code_label"], sep=": ")
     codes_dims.name = "description"
     return codes_dims
 
 
-@st.cache_data()
-def load_codelist() -> pd.DataFrame:
-    req = get_cached_session()
-    codelist = parse_codelist(fetch_codelist(req))
-    return codelist
+@st.cache_resource
+def load_codes_search_index() -> SearchIndex:
+    # Read-only, shared by sessions without copies: search dimension, code and labels
+    codes = load_dimensions_and_codes()
+    dimensions = codes.index.get_level_values("dimension")
+    texts = dimensions + " " + codes.index.get_level_values("code") + " " + codes
+    return SearchIndex.from_texts(texts)
 
 
-@st.cache_data()
-def load_dataset(code: str, codelist: pd.DataFrame) -> pd.DataFrame:
-    # Return desiderd dataset by code in `long-format` (time as index)
-    with global_download_lock():
-        data = fetch_and_preprocess_dataset(code)
-    data = cast_time_to_datetimeindex(data)
-    data = append_code_descriptions(data, codelist)
-    # `flag` shown before `value` to be near others filter key
-    return data[["flag", "value"]]
+@memory_cache.cached
+def load_dimension_codelist(dimension: str) -> pd.DataFrame:
+    # Only the most recently used codelists are kept parsed in memory
+    return fetch_dimension_codelist(get_cached_session(), dimension)
 
 
-@st.cache_data()
-def load_stash(stash: dict) -> pd.DataFrame:
-    data = empty_eurostat_dataframe()
-    for code, properties in stash.items():
-        indexes, flags, stash = (
-            properties["indexes"],
-            properties["flags"],
-            properties["stash"],
-        )
-        if stash:
-            codelist = load_codelist()
-            df = load_dataset(code, codelist)
-            df = filter_dataset_replacing_NA(
-                df,
-                indexes,
-                flags,
-            )
-            # Append dataset code to data as first level
-            df = pd.concat(
-                {code: df},
-                names=["dataset"],
+def load_codelists(dimensions: list[str]) -> pd.DataFrame:
+    # Return the codelist of `dimensions` only, fetched one dimension at a time
+    codelists = [load_dimension_codelist(dimension) for dimension in dimensions]
+    return pd.concat(codelists).sort_index()
+
+
+@st.cache_resource(ttl=timedelta(days=1))
+def load_last_updates() -> pd.Series:
+    # Return a series with datasets code as index and last data update as values.
+    # Shared without copies: looked up by the cache key of every loaded dataset
+    with download_lock("toc"):
+        toc = fetch_stored_table_of_contents(caching_days=1)
+    return toc["last update of data"]
+
+
+@st.cache_resource(ttl=timedelta(days=1))
+def load_time_coverage() -> pd.DataFrame:
+    # First and last period of every dataset, ex: 1980-01 and 2023-Q1
+    with download_lock("toc"):
+        toc = fetch_stored_table_of_contents(caching_days=1)
+    return toc[["data start", "data end"]]
+
+
+@st.cache_resource(ttl=timedelta(days=1))
+def load_metabase() -> pd.DataFrame:
+    # Codes of every dataset dimension, in the order of their series keys.
+    # Shared without copies, only rows of a single dataset are ever selected
+    return fetch_metabase(get_cached_session())
+
+
+def dataset_version(code: str) -> str | None:
+    # Last data update of a dataset, a new one is published as a new cache entry
+    version = load_last_updates().get(code)
+    return str(version) if version else None
+
+
+@memory_cache.cached(key=lambda code: (code, dataset_version(code)))
+def load_dataset(code: str) -> pd.DataFrame:
+    # Return desiderd dataset by code in `long-format` (time as index)
+    # A stored dataset is reused until Eurostat publishes an update of it
+    # Stored datasets are memory-mapped, read-only: every session and worker process
+    # of the host shares the same pages, hits are not copied
+    version = load_last_updates().get(code)
+    with download_lock(code):
+        # Concurrent requests of the same code wait for the first one to store it
+        data = read_dataset(code, version) if version else None
+        if data is None:
+            # A new version must not be served from HTTP cache
+            data = fetch_and_describe_dataset(
+                code, load_codelists, refresh=bool(version)
             )
-            # Merging with index resetted to preserve unique columns
-            data = pd.concat([data.reset_index(), df.reset_index()])
-            # Restore a global index based on current stash
-            data = data.set_index(data.columns.difference(["flag", "value"]).to_list())
+            if version:
+                write_dataset(code, version, data)
+                data = read_dataset(code, version)
+                trim_cache()  # Least recently used files make room for it
+    return data
+
+
+@memory_cache.cached(key=lambda code, indexes: (code, dataset_version(code), indexes))
+def load_partial_dataset(code: str, indexes: dict) -> pd.DataFrame:
+    # Return only the `indexes` selection of a dataset, cached apart from full ones
+    return fetch_and_describe_dataset(code, load_codelists, indexes=indexes)
+
+
+def is_dataset_stored(code: str) -> bool:
+    version = load_last_updates().get(code)
+    return bool(version) and os.path.exists(dataset_path(code, version))
+
+
+def filter_fingerprint(properties: dict) -> str:
+    return fingerprint([properties["indexes"], properties["flags"]])
+
+
+@memory_cache.cached(
+    key=lambda code, properties, partial=False: (
+        code,
+        dataset_version(code),
+        filter_fingerprint(properties),
+        partial,
+    )
+)
+def load_filtered_dataset(
+    code: str, properties: dict, partial: bool = False
+) -> pd.DataFrame:
+    # Download a narrow selection only, unless the full dataset is already at hand
+    # Every (dataset, filter) slice is kept apart: editing a stashed dataset filter
+    # leaves the others untouched
+    indexes, flags = properties["indexes"], properties["flags"]
+    if partial and is_narrow_filter(indexes) and not is_dataset_stored(code):
+        df = load_partial_dataset(code, indexes)
+    else:
+        df = load_dataset(code)
+    return filter_dataset_replacing_NA(df, indexes, flags)
+
+
+@memory_cache.cached(key=lambda code: (code, dataset_version(code)))
+def describe_dataset_filters(code: str) -> Tuple[dict, list] | None:
+    # Same filters as `load_dataset_filters`, described by the metabase and the time
+    # coverage of the dataset. None if any is missing
+    metabase = load_metabase()
+    rows = metabase[metabase["dataset"] == code.lower()]
+    coverage = load_time_coverage()
+    if rows.empty or code not in coverage.index or coverage.loc[code].isna().any():
+        return None
+    dimensions = rows["dimension"].unique().tolist()
+    codelist = load_codelists([*dimensions, "obs_flag"])
+    indexes = {
+        dimension: describe_codes(
+            pd.Index(rows.loc[rows["dimension"] == dimension, "code"].astype(str)),
+            codelist,
+            dimension,
+        ).to_list()
+        for dimension in dimensions
+    }
+    start, end = coverage.loc[code]
+    indexes["time"] = [int(str(start)[:4]), int(str(end)[:4])]
+    codes = codelist.index
+    flags = codes.get_level_values("code")[
+        codes.get_level_values("dimension") == "obs_flag"
+    ]
+    return indexes, ["<NA>", *describe_codes(flags, codelist, "obs_flag")]
+
+
+def load_dataset_filters(code: str, partial: bool = PARTIAL_FETCH) -> Tuple[dict, list]:
+    # Codes of every dimension (first and last year of `time`) and flags to filter a
+    # dataset by. With `partial`, datasets not stored yet are described without
+    # downloading them: narrow selections of them are downloaded alone
+    if partial and not is_dataset_stored(code):
+        filters = describe_dataset_filters(code)
+        if filters is not None:
+            return filters
+    dataset = load_dataset(code)
+    index: pd.MultiIndex = dataset.index  # type: ignore
+    indexes = {name: level.to_list() for name, level in zip(index.names, index.levels)}
+    if "time" in indexes:
+        indexes["time"] = [min(indexes["time"]).year, max(indexes["time"]).year]
+    flags = [
+        "<NA>" if pd.isna(flag) else flag for flag in dataset["flag"].unique().tolist()
+    ]
+    return indexes, flags
+
+
+@memory_cache.cached(
+    key=lambda code, properties: (
+        code,
+        dataset_version(code),
+        filter_fingerprint(properties),
+    )
+)
+def is_dataset_unfiltered(code: str, properties: dict) -> bool:
+    # Whether every country, year and flag of a dataset is selected, as offered by
+    # the `Data` page: other dimensions select variables, not their data points
+    indexes, flags = load_dataset_filters(code)
+    selected = properties["indexes"]
+    if "geo" in indexes and not set(indexes["geo"]) <= set(selected.get("geo", [])):
+        return False
+    if "time" in indexes and "time" in selected:
+        start, end = selected["time"]
+        if start > indexes["time"][0] or end < indexes["time"][1]:
+            return False
+    return set(flags) <= set(properties["flags"])
+
+
+def is_stash_unfiltered(stash: dict) -> bool:
+    return all(
+        is_dataset_unfiltered(code, properties)
+        for code, properties in stash.items()
+        if properties["stash"]
+    )
+
+
+def map_concurrently(function: Callable, items: Iterable) -> list:
+    # Map `function` on a bounded thread pool, the slowest item bounds the overall time
+    ctx = get_script_run_ctx(suppress_warning=True)
+    with ThreadPoolExecutor(
+        max_workers=MAX_DOWNLOAD_WORKERS,
+        # Let workers use streamlit caches on behalf of the running session
+        initializer=lambda: add_script_run_ctx(current_thread(), ctx),
+    ) as pool:
+        return list(pool.map(function, items))
+
+
+def stash_key(stash: dict, partial: bool = PARTIAL_FETCH) -> tuple:
+    # Versions and filters of the stashed datasets only, whatever else `stash` holds
+    return partial, [
+        (code, dataset_version(code), filter_fingerprint(properties))
+        for code, properties in sorted(stash.items())
+        if properties["stash"]
+    ]
+
+
+@memory_cache.cached(key=stash_key)
+def load_stash(stash: dict, partial: bool = PARTIAL_FETCH) -> pd.DataFrame:
+    # With `partial`, narrow selections are filtered by Eurostat before download
+    codes = [code for code, properties in stash.items() if properties["stash"]]
+    datasets = map_concurrently(
+        lambda code: load_filtered_dataset(code, stash[code], partial), codes
+    )
+    # Append dataset code to data as first level, every dataset at once
+    datasets = {code: df for code, df in zip(codes, datasets) if not df.empty}
+    data = stack_datasets(datasets) if datasets else empty_eurostat_dataframe()
+    # Datasets have different flags, categories are merged back after concatenation
+    data["flag"] = data["flag"].astype("category")
     return data
 
 
+@memory_cache.cached(key=stash_key)
+def load_wide_stash(stash: dict, partial: bool = PARTIAL_FETCH) -> pd.DataFrame:
+    # Flag and value of every stashed variable by (geo, time), pivoted once per stash:
+    # reruns of the pages changing a widget only are hits.
+    # Values of pivots too wide to be plotted, and mostly empty, are stored sparse
+    data = load_stash(stash, partial)
+    return data if data.empty else wide_format(data, MAX_VARIABLES_PLOT)
+
+
+def show_cache_stats(position: DeltaGenerator = st._main):
+    # Hits, misses, evictions and size of the cache folder, shared by every session
+    stats = cache_stats()
+    used = stats["file_bytes"] + stats["response_bytes"]
+    position.progress(
+        min(used / stats["max_bytes"], 1.0),
+        text=f"Cache: {used / 2**20:,.0f} of {stats['max_bytes'] / 2**20:,.0f} MB",
+    )
+    position.dataframe(pd.Series(stats, name="value"), use_container_width=True)
+
+
+def show_memory_usage(position: DeltaGenerator = st._main):
+    # Loaded datasets, codelists and stashes held by this server process
+    usage = memory_cache.usage()
+    position.progress(
+        min(usage["bytes"] / usage["max_bytes"], 1.0),
+        text=f"Memory: {usage['bytes'] / 2**20:,.0f} of "
+        f"{usage['max_bytes'] / 2**20:,.0f} MB",
+    )
+    position.dataframe(pd.Series(usage, name="value"), use_container_width=True)
+
+
 def read_stash_from_history(history):
     # Filter stash dataset only
     return {k: v for k, v in history.items() if v["stash"]}
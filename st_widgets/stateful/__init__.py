@@ -14,3 +14,4 @@ from .multiselect import stateful_multiselect
 from .number_input import stateful_number_input
 from .selectbox import stateful_selectbox
 from .slider import stateful_slider
+from .text_input import stateful_text_input
@@ -0,0 +1,146 @@
+import gzip
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture()
+def loaded_dataset():
+    # Emulate a loaded dataset
+    df = pd.DataFrame(
+        {
+            "flag": {
+                ("PC_IND", "AL | Albania", "2016-01-01"): np.nan,
+                ("PC_IND", "IT | Italy", "2018-01-01"): "u | low reliability",
+                ("PC_IND", "IT | Italy", "2021-01-01"): np.nan,
+            },
+            "value": {
+                ("PC_IND", "AL | Albania", "2016-01-01"): 100.0,
+                ("PC_IND", "IT | Italy", "2018-01-01"): np.nan,
+                ("PC_IND", "IT | Italy", "2021-01-01"): 100.0,
+            },
+        }
+    )
+    df["flag"] = df["flag"].astype("category")
+    df.index = df.index.set_names(["unit", "geo", "time"])
+    df.index = df.index.set_levels(pd.to_datetime(df.index.levels[2]), level="time")
+    return df
+
+
+@pytest.fixture
+def codelist():
+    # TODO order alphabetically
+    return pd.DataFrame.from_dict(
+        {
+            "index": [
+                ("geo", "AL"),
+                ("geo", "IT"),
+                (
+                    "ind_type",
+                    "CB_EU_FOR",
+                ),
+                (
+                    "indic_is",
+                    "I_IUG_DKPC",
+                ),
+                ("obs_flag", "d"),
+                ("obs_flag", "f"),
+                ("obs_flag", "u"),
+                ("occur", "ADLH"),
+                ("occur", "M12"),
+                ("occur", "Y5"),
+                ("unit", "PC_IND"),
+            ],
+            "columns": ["dimension_label", "code_label"],
+            "data": [
+                ["Geopolitical entity (reporting)", "Albania"],
+                ["Geopolitical entity (reporting)", "Italy"],
+                [
+                    "Individual type",
+                    "Individuals who are born in another EU Member State",
+                ],
+                [
+                    "Information society indicator",
+                    "Individuals used the internet on a desktop computer",
+                ],
+                ["Observation status (Flag)", "definition differs, see metadata"],
+                ["Observation status (Flag)", "forecast"],
+                ["Observation status (Flag)", "low reliability"],
+                ["Occurence", "Adulthood"],
+                ["Occurence", "Last 12 months"],
+                ["Occurence", "Last 5 years"],
+                ["Unit of measure", "Percentage of individuals"],
+            ],
+            "index_names": ["dimension", "code"],
+            "column_names": [None],
+        },
+        orient="tight",
+    )
+
+
+@pytest.fixture
+def metabase():
+    return pd.DataFrame.from_dict(
+        {
+            "dataset": {
+                414853: "gbv_any_occ",
+                414854: "gbv_any_occ",
+                414855: "gbv_any_occ",
+                414903: "gbv_dv_occ",
+                414904: "gbv_dv_occ",
+                414905: "gbv_dv_occ",
+            },
+            "dimension": {
+                414853: "occur",
+                414854: "occur",
+                414855: "occur",
+                414903: "occur",
+                414904: "occur",
+                414905: "occur",
+            },
+            "code": {
+                414853: "M12",
+                414854: "Y5",
+                414855: "ADLH",
+                414903: "M12",
+                414904: "Y5",
+                414905: "ADLH",
+            },
+        }
+    )
+
+
+@pytest.fixture()
+def dataset_tsv():
+    # Emulate a downloaded dataset from Eurostat API, same data as `raw_dataset`
+    return gzip.compress(
+        "ind_type,indic_is,unit,geo\\TIME_PERIOD\t2015 \t2016 \t2021 \t2018 \r\n"
+        "CB_EU_FOR,I_IUG_DKPC,PC_IND,AL\t: \t100.0 \t: \t: \r\n"
+        "CB_EU_FOR,I_IUG_DKPC,PC_IND,IT\t: \t: \t100.0 \t100.0 u\r\n".encode()
+    )
+
+
+@pytest.fixture()
+def dataset_server(dataset_tsv):
+    # Emulate Eurostat API locally, serving `dataset_tsv` to any request
+    paths = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            paths.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(dataset_tsv)))
+            self.end_headers()
+            self.wfile.write(dataset_tsv)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", paths
+    server.shutdown()
+    server.server_close()
@@ -1,19 +1,33 @@
+import gzip
+import io
+
 import numpy as np
 import pandas as pd
 import pandas.api.types as ptypes
 import pytest
+import requests_cache
 from pandas.testing import assert_frame_equal, assert_index_equal
 
 from datawizard.data import (
     append_code_descriptions,
+    cached_parse_periods,
     cast_time_to_datetimeindex,
+    concat_datasets,
     fetch_dataset,
+    fetch_dataset_tsv,
+    fetch_dimension_codelist,
+    fetch_metabase,
     fetch_and_preprocess_dataset,
     fetch_table_of_contents,
     filter_dataset,
+    is_narrow_filter,
     parse_codelist,
     preprocess_dataset,
-    metabase2datasets,
+    parse_periods,
+    densify,
+    read_dataset_tsv,
+    stack_datasets,
+    wide_format,
 )
 
 
@@ -259,112 +273,6 @@ def codelist_response():
     }
 
 
-@pytest.fixture
-def codelist():
-    # TODO order alphabetically
-    return pd.DataFrame.from_dict(
-        {
-            "index": [
-                ("geo", "AL"),
-                ("geo", "IT"),
-                (
-                    "ind_type",
-                    "CB_EU_FOR",
-                ),
-                (
-                    "indic_is",
-                    "I_IUG_DKPC",
-                ),
-                ("obs_flag", "d"),
-                ("obs_flag", "f"),
-                ("obs_flag", "u"),
-                ("occur", "ADLH"),
-                ("occur", "M12"),
-                ("occur", "Y5"),
-                ("unit", "PC_IND"),
-            ],
-            "columns": ["dimension_label", "code_label"],
-            "data": [
-                ["Geopolitical entity (reporting)", "Albania"],
-                ["Geopolitical entity (reporting)", "Italy"],
-                [
-                    "Individual type",
-                    "Individuals who are born in another EU Member State",
-                ],
-                [
-                    "Information society indicator",
-                    "Individuals used the internet on a desktop computer",
-                ],
-                ["Observation status (Flag)", "definition differs, see metadata"],
-                ["Observation status (Flag)", "forecast"],
-                ["Observation status (Flag)", "low reliability"],
-                ["Occurence", "Adulthood"],
-                ["Occurence", "Last 12 months"],
-                ["Occurence", "Last 5 years"],
-                ["Unit of measure", "Percentage of individuals"],
-            ],
-            "index_names": ["dimension", "code"],
-            "column_names": [None],
-        },
-        orient="tight",
-    )
-
-
-@pytest.fixture
-def metabase():
-    return pd.DataFrame.from_dict(
-        {
-            "dataset": {
-                414853: "gbv_any_occ",
-                414854: "gbv_any_occ",
-                414855: "gbv_any_occ",
-                414903: "gbv_dv_occ",
-                414904: "gbv_dv_occ",
-                414905: "gbv_dv_occ",
-            },
-            "dimension": {
-                414853: "occur",
-                414854: "occur",
-                414855: "occur",
-                414903: "occur",
-                414904: "occur",
-                414905: "occur",
-            },
-            "code": {
-                414853: "M12",
-                414854: "Y5",
-                414855: "ADLH",
-                414903: "M12",
-                414904: "Y5",
-                414905: "ADLH",
-            },
-        }
-    )
-
-
-@pytest.fixture
-def reverse_index():
-    # Emulate metabase2dataset output (a metabase enriched with descriptions)
-    return pd.DataFrame.from_dict(
-        {
-            "index": [
-                ("ADLH", "Adulthood", "occur", "Occurence"),
-                ("M12", "Last 12 months", "occur", "Occurence"),
-                ("Y5", "Last 5 years", "occur", "Occurence"),
-            ],
-            "columns": ["dataset"],
-            "data": [
-                [["gbv_any_occ", "gbv_dv_occ"]],
-                [["gbv_any_occ", "gbv_dv_occ"]],
-                [["gbv_any_occ", "gbv_dv_occ"]],
-            ],
-            "index_names": ["code", "code_label", "dimension", "dimension_label"],
-            "column_names": [None],
-        },
-        orient="tight",
-    )
-
-
 def test_fetch_table_of_contents(mocker, raw_table_of_contents):
     mocker.patch(
         "datawizard.data.eurostat.get_toc_df",
@@ -401,13 +309,105 @@ def test_preprocess_dataset(mocker, raw_dataset, dataset):
     assert_frame_equal(data, dataset)
 
 
-def test_fetch_and_preprocess_dataset(mocker, raw_dataset):
-    mocker.patch(
-        "datawizard.data.fetch_dataset",
-        return_value=raw_dataset,
+def test_fetch_dataset_tsv(mocker, dataset_tsv):
+    session = mocker.Mock()
+    session.get.return_value.content = dataset_tsv
+    assert fetch_dataset_tsv("fake-code", session) == dataset_tsv
+
+    # Not a gzipped TSV, ex: an asynchronous request
+    session.get.return_value.content = b"<xml/>"
+    assert fetch_dataset_tsv("fake-code", session) is None
+
+
+def test_read_dataset_tsv(dataset_tsv, raw_dataset):
+    chunks = list(read_dataset_tsv(io.BytesIO(dataset_tsv), blocksize=64))
+    assert len(chunks) == 2
+    data = pd.concat(chunks, ignore_index=True)
+    assert_frame_equal(preprocess_dataset(data), preprocess_dataset(raw_dataset))
+
+
+def test_concat_datasets(dataset):
+    dataset = dataset.assign(flag=dataset["flag"].astype("category"))
+    data = concat_datasets([dataset.iloc[[2]], dataset.iloc[:1], dataset.iloc[[1]]])
+    assert_frame_equal(data, dataset.iloc[[2, 0, 1]])
+
+
+def test_stack_datasets(loaded_dataset):
+    datasets = {"A": loaded_dataset, "B": loaded_dataset.droplevel("unit").iloc[1:]}
+    data = stack_datasets(datasets)
+    # Same as growing a frame of reset indexes, dataset by dataset
+    expected = pd.concat(
+        [
+            pd.concat({code: d}, names=["dataset"]).reset_index()
+            for code, d in datasets.items()
+        ]
+    )
+    expected = expected.set_index(["dataset", "geo", "time", "unit"])
+    expected["flag"] = expected["flag"].astype("category")
+    assert_frame_equal(data, expected)
+    assert data.loc["B"].index.get_level_values("unit").isna().all()
+
+
+def test_wide_format(loaded_dataset):
+    data = stack_datasets(
+        {"A": loaded_dataset, "B": loaded_dataset.droplevel("unit").iloc[1:]}
     )
+    expected = data.unstack(["dataset", "unit"])
+    assert_frame_equal(wide_format(data), expected)
+    # Too wide and too empty to be dense
+    wide = wide_format(data, max_dense_columns=1, min_density=0.9)
+    assert isinstance(wide[("value", "A", "PC_IND")].dtype, pd.SparseDtype)
+    assert_frame_equal(densify(wide), expected)
+
+
+def test_fetch_and_preprocess_dataset(mocker, raw_dataset, dataset_tsv, dataset):
+    mocker.patch("datawizard.data.get_cached_session")
+    mocker.patch("datawizard.data.fetch_dataset_tsv", return_value=dataset_tsv)
+    data = fetch_and_preprocess_dataset("fake-code", blocksize=64)
+    assert_frame_equal(data, dataset)
+
+    # Fallback on `eurostat` download
+    mocker.patch("datawizard.data.fetch_dataset_tsv", return_value=None)
+    mocker.patch("datawizard.data.fetch_dataset", return_value=raw_dataset)
     data = fetch_and_preprocess_dataset("fake-code")
-    assert isinstance(data, pd.DataFrame)
+    assert_frame_equal(data, dataset)
+
+
+def test_fetch_and_preprocess_partial_dataset(mocker, dataset_server, dataset):
+    url, paths = dataset_server
+    session = requests_cache.CachedSession(backend="memory")
+    mocker.patch("datawizard.data.get_cached_session", return_value=session)
+    mocker.patch("datawizard.data.DATASET_ENDPOINT", url + "/data/{code}?format=TSV")
+    mocker.patch(
+        "datawizard.data.DATASET_FILTER_ENDPOINT", url + "/data/{code}/{key}?format=TSV"
+    )
+    indexes = {
+        "ind_type": ["CB_EU_FOR | Description"],
+        "indic_is": ["I_IUG_DKPC"],
+        "unit": ["PC_IND"],
+        "geo": ["AL | Albania", "IT | Italy"],
+        "time": [2016, 2021],
+    }
+    data = fetch_and_preprocess_dataset("fake-code", indexes=indexes)
+    assert_frame_equal(data, dataset)
+    assert paths == [
+        "/data/fake-code/CB_EU_FOR.I_IUG_DKPC.PC_IND.AL+IT"
+        "?format=TSV&startPeriod=2016&endPeriod=2021"
+    ]
+
+    # Partial and full downloads are cached apart
+    fetch_and_preprocess_dataset("fake-code")
+    fetch_and_preprocess_dataset("fake-code", indexes=indexes)
+    assert paths[1:] == ["/data/fake-code?format=TSV"]
+
+
+def test_is_narrow_filter():
+    indexes = {"unit": ["PC"], "geo": ["AL", "IT"], "time": [2016, 2021]}
+    assert is_narrow_filter(indexes)
+    assert not is_narrow_filter({**indexes, "geo": []})
+    assert not is_narrow_filter(
+        {**indexes, "geo": [f"G{i}" for i in range(100)], "unit": list("ABC") * 50}
+    )
 
 
 def test_cast_time_to_datetimeindex(
@@ -428,9 +428,48 @@ def test_cast_time_to_datetimeindex(
     dataset = cast_time_to_datetimeindex(monthly_dataset)
     assert ptypes.is_datetime64_dtype(monthly_dataset.index.get_level_values("time"))  # type: ignore
 
-    with pytest.raises(NotImplementedError):
-        cast_time_to_datetimeindex(quarterly_dataset)
-        cast_time_to_datetimeindex(weekly_dataset)
+    dataset = cast_time_to_datetimeindex(quarterly_dataset)
+    assert_index_equal(
+        dataset.index.levels[-1],  # type: ignore
+        pd.DatetimeIndex(["2016-04-01", "2018-10-01", "2021-07-01"], name="time"),
+    )
+
+    dataset = cast_time_to_datetimeindex(weekly_dataset)
+    assert_index_equal(
+        dataset.index.levels[-1],  # type: ignore
+        pd.DatetimeIndex(["2016-03-21", "2018-11-05", "2021-07-26"], name="time"),
+    )
+
+
+def test_parse_periods():
+    periods = pd.Index(
+        ["2020", "2020-S2", "2020Q3", "2020-Q4", "2020M03", "2020-11"]
+        + ["2020-W05", "2020W53", "2020-03-15", "2020M03D16"],
+        name="time",
+    )
+    expected = pd.DatetimeIndex(
+        ["2020-01-01", "2020-07-01", "2020-07-01", "2020-10-01", "2020-03-01"]
+        + ["2020-11-01", "2020-01-27", "2020-12-28", "2020-03-15", "2020-03-16"],
+        name="time",
+    )
+    assert_index_equal(parse_periods(periods), expected)
+    # Cached periods are mixed with new ones
+    assert_index_equal(cached_parse_periods(periods[:4]), expected[:4])
+    assert_index_equal(cached_parse_periods(periods), expected)
+
+    with pytest.raises(ValueError):
+        parse_periods(pd.Index(["2020", "2020-X1"]))
+
+
+def test_cast_time_to_datetimeindex_mixed_frequencies():
+    # Annual and monthly periods starting at the same date are kept apart by `freq`
+    index = pd.MultiIndex.from_tuples(
+        [("A", "2020"), ("M", "2020-01"), ("M", "2020-02")], names=["freq", "time"]
+    )
+    data = pd.DataFrame({"flag": [np.nan] * 3, "value": [1.0, 2.0, 3.0]}, index=index)
+    data = cast_time_to_datetimeindex(data)
+    assert data.index.levels[-1].is_unique  # type: ignore
+    assert data.index.get_level_values("time").month.tolist() == [1, 1, 2]
 
 
 def test_append_code_descriptions(dataset, codelist):
@@ -442,6 +481,11 @@ def test_append_code_descriptions(dataset, codelist):
         ),
     )
     assert df["flag"].iloc[1] == "u | low reliability"
+    assert isinstance(df["flag"].dtype, pd.CategoricalDtype)
+
+    # Codes not found in codelist are kept untouched
+    df = append_code_descriptions(dataset, codelist.drop(index="geo"))
+    assert df.index.get_level_values("geo").tolist() == ["AL", "IT", "IT"]
 
 
 def test_filter_dataset(dataset):
@@ -474,11 +518,62 @@ def test_filter_dataset(dataset):
     assert dataset.index.names == ["geo", "time"]
 
 
+def test_filter_dataset_time_as_last_level(dataset, geo_time_inverted_dataset):
+    indexes = {
+        "ind_type": ["CB_EU_FOR"],
+        "indic_is": ["I_IUG_DKPC"],
+        "unit": ["PC_IND"],
+        "geo": ["AL", "IT"],
+        "time": [2017, 2021],
+    }
+    flags = [np.nan, "u"]
+    assert_frame_equal(
+        filter_dataset(
+            cast_time_to_datetimeindex(geo_time_inverted_dataset), indexes, flags
+        ),
+        filter_dataset(cast_time_to_datetimeindex(dataset), indexes, flags),
+    )
+
+
+def test_filter_dataset_categorical_flags(dataset):
+    original = cast_time_to_datetimeindex(dataset)
+    original["flag"] = original["flag"].astype("category")
+    indexes = {
+        "ind_type": ["CB_EU_FOR"],
+        "indic_is": ["I_IUG_DKPC"],
+        "unit": ["PC_IND"],
+        "geo": ["AL", "IT"],
+        "time": [2015, 2021],
+    }
+    dataset = filter_dataset(original, indexes, [np.nan, "u"])
+    assert dataset["flag"].dtype == original["flag"].dtype
+
+
+def test_fetch_dimension_codelist(mocker, codelist_response, codelist):
+    session = mocker.Mock()
+    session.get.return_value.status_code = 200
+    session.get.return_value.json.return_value = codelist_response["link"]["item"][0]
+    df = fetch_dimension_codelist(session, "occur")
+    assert session.get.call_args.args[0].split("?")[0].endswith("/OCCUR")
+    assert_frame_equal(df, codelist.loc[["occur"]])
+
+    # Unknown codelist
+    session.get.return_value.status_code = 404
+    df = fetch_dimension_codelist(session, "fake-dimension")
+    assert df.empty
+    assert df.index.names == ["dimension", "code"]
+
+
 def test_parse_codelist(codelist_response, codelist):
     df = parse_codelist(codelist_response)
     assert_frame_equal(df, codelist)
 
 
-def test_metabase2datasets(metabase, codelist, reverse_index):
-    meta = metabase2datasets(metabase, codelist)
-    assert_frame_equal(meta, reverse_index)
+def test_fetch_metabase(mocker, metabase):
+    session = mocker.Mock()
+    session.get.return_value.content = gzip.compress(
+        metabase.to_csv(sep="\t", header=False, index=False).encode()
+    )
+    df = fetch_metabase(session)
+    assert (df.dtypes == "category").all()
+    assert_frame_equal(df.astype(object), metabase.reset_index(drop=True))
@@ -0,0 +1,103 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests_cache
+
+from datawizard.cache import (
+    cache_entries,
+    cache_stats,
+    http_cache_size,
+    record,
+    trim_cache,
+    vacuum_http_cache,
+)
+
+
+def write_file(path, size, mtime):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(b"x" * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_trim_cache(tmp_path):
+    paths = {
+        "http_path": os.path.join(tmp_path, "sdmx.sqlite"),
+        "stats_path": os.path.join(tmp_path, "stats.sqlite"),
+    }
+    now = time.time()
+    write_file(os.path.join(tmp_path, "datasets", "A.arrow"), 100, now - 300)
+    write_file(os.path.join(tmp_path, "datasets", "B.arrow"), 100, now - 200)
+    write_file(os.path.join(tmp_path, "toc.arrow"), 100, now - 100)
+    # The oldest file was read last
+    record({"file_hits": 1}, [os.path.join("datasets", "A.arrow")], paths["stats_path"])
+
+    entries = cache_entries(tmp_path, **paths)
+    assert entries.index.tolist() == [
+        os.path.join("datasets", "B.arrow"),
+        "toc.arrow",
+        os.path.join("datasets", "A.arrow"),
+    ]
+    assert trim_cache(300, tmp_path, **paths).empty
+
+    evicted = trim_cache(150, tmp_path, **paths)
+    assert evicted.index.tolist() == [os.path.join("datasets", "B.arrow"), "toc.arrow"]
+    assert not os.path.exists(os.path.join(tmp_path, "toc.arrow"))
+    assert os.path.exists(os.path.join(tmp_path, "datasets", "A.arrow"))
+
+    stats = cache_stats(150, tmp_path, **paths)
+    assert stats["file_hits"] == 1
+    assert stats["evictions"] == 2
+    assert stats["evicted_bytes"] == 200
+    assert stats["files"] == 1
+    assert stats["file_bytes"] == 100
+
+
+def test_trim_cache_responses(tmp_path):
+    paths = {
+        "http_path": os.path.join(tmp_path, "sdmx.sqlite"),
+        "stats_path": os.path.join(tmp_path, "stats.sqlite"),
+    }
+    cache = requests_cache.SQLiteCache(paths["http_path"])
+    with cache.responses.connection(commit=True) as con:
+        # Responses expiring later were stored later
+        con.executemany(
+            "INSERT INTO responses (key, value, expires) VALUES (?, ?, ?)",
+            [
+                ("old", b"x" * 200_000, time.time()),
+                ("new", b"x" * 200_000, time.time() + 1),
+            ],
+        )
+    entries = cache_entries(tmp_path, **paths)
+    assert entries.index.tolist() == ["http:old", "http:new"]
+    assert entries["bytes"].tolist() == [200_000, 200_000]
+
+    # Reading the old response keeps it
+    record({"http_hits": 1}, ["http:old"], paths["stats_path"])
+    vacuum_http_cache(paths["http_path"])
+    size = http_cache_size(paths["http_path"])
+    evicted = trim_cache(300_000, tmp_path, **paths)
+    assert evicted.index.tolist() == ["http:new"]
+    assert list(cache.responses.keys()) == ["old"]
+    # Responses are budgeted as evicted: the remaining one fits
+    assert trim_cache(200_000, tmp_path, **paths).empty
+    stats = cache_stats(200_000, tmp_path, **paths)
+    assert stats["response_bytes"] == 200_000
+    # The database file shrinks once vacuumed
+    assert stats["http_cache_bytes"] < size - 150_000
+    assert stats["http_cache_bytes"] == http_cache_size(paths["http_path"])
+
+
+def test_trim_cache_one_at_a_time(tmp_path):
+    paths = {
+        "http_path": os.path.join(tmp_path, "sdmx.sqlite"),
+        "stats_path": os.path.join(tmp_path, "stats.sqlite"),
+    }
+    for i in range(8):
+        write_file(os.path.join(tmp_path, f"{i}.arrow"), 100, time.time() - i)
+    with ThreadPoolExecutor(8) as pool:
+        evicted = list(pool.map(lambda _: trim_cache(400, tmp_path, **paths), range(8)))
+    # Every file is evicted once, by the first trim
+    assert sum(len(entries) for entries in evicted) == 4
+    assert cache_stats(400, tmp_path, **paths)["evictions"] == 4
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from pingouin import rm_corr
+
+from datawizard.clustering import (
+    clustermap,
+    read_clustermap,
+    rm_correlation,
+    variable_names,
+    wide_variables,
+    write_clustermap,
+)
+
+
+@pytest.fixture
+def variables():
+    # Two groups of variables following opposite trends, plus noise
+    rng = np.random.default_rng(42)
+    index = pd.MultiIndex.from_product(
+        [["AT", "BE", "IT", "FR"], pd.date_range("2000", periods=10, freq="YS")],
+        names=["geo", "time"],
+    )
+    trend = rng.normal(size=len(index))
+    variables = pd.DataFrame(
+        {
+            "a1": trend + 0.1 * rng.normal(size=len(index)),
+            "b1": -trend + 0.1 * rng.normal(size=len(index)),
+            "a2": trend + 0.1 * rng.normal(size=len(index)),
+            "c1": rng.normal(size=len(index)),
+        },
+        index=index,
+    )
+    return variables.mask(rng.random(variables.shape) < 0.1)
+
+
+def test_variable_names():
+    columns = pd.MultiIndex.from_tuples(
+        [("EI_BSCO_M", "A | Annual", np.nan)], names=["dataset", "freq", "age"]
+    )
+    assert variable_names(columns) == ["EI_BSCO_M • A | Annual"]
+
+
+def test_wide_variables(loaded_dataset):
+    wide = wide_variables({"fake-code": loaded_dataset})
+    assert wide.index.names == ["geo", "time"]
+    assert wide.notna().sum().sum() == loaded_dataset["value"].notna().sum()
+    assert all(name.startswith("fake-code") for name in wide.columns)
+
+
+def test_rm_correlation(variables):
+    r, pval = rm_correlation(variables, workers=2)
+    for x, y in [("a1", "b1"), ("a2", "c1")]:
+        data = variables[[x, y]].dropna().reset_index()
+        expected = rm_corr(data=data, x=x, y=y, subject="geo")
+        assert r.loc[x, y] == pytest.approx(expected.r.squeeze())
+        assert pval.loc[x, y] == pytest.approx(expected.pval.squeeze())
+    assert np.allclose(r, r.T, equal_nan=True)
+
+
+def test_rm_correlation_masks_as_pandas(variables):
+    # The `Correlations` page computes them live with pandas, or reads them precomputed
+    def rm_corr_pval(x, y):
+        data = pd.DataFrame({"x": x, "y": y, "geo": subjects})
+        return rm_corr(data=data, x="x", y="y", subject="geo").pval.squeeze()
+
+    # Rows are complete: pandas passes no subjects along the values of a pair
+    variables = variables.dropna()
+    subjects = variables.index.get_level_values("geo")
+    expected = variables.corr(method=rm_corr_pval)  # type: ignore
+    _, pval = rm_correlation(variables, workers=2)
+    for threshold in [0.01, 0.05, 0.5]:
+        assert_frame_equal(pval > threshold, expected > threshold)
+
+
+def test_clustermap(tmp_path, variables):
+    clusters = clustermap(variables, workers=2)
+    assert clusters.index.names == ["stat", "cluster", "variable"]
+    groups = clusters.loc["r"].index.to_frame()["cluster"].droplevel("cluster")
+    # Opposite trends are grouped together, noise apart
+    assert groups["a1"] == groups["a2"] == groups["b1"] != groups["c1"]
+    # Grouped variables are contiguous
+    assert clusters.columns.get_loc("c1") in [0, 3]
+
+    path = os.path.join(tmp_path, "clustermap.csv.gz")
+    assert read_clustermap(path) is None
+    write_clustermap(clusters, path)
+    assert_frame_equal(read_clustermap(path), clusters)  # type: ignore
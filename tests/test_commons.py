@@ -0,0 +1,106 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+import requests_cache
+
+from st_widgets import commons
+
+
+@pytest.fixture(autouse=True)
+def memory_cache():
+    # Loaders share a process wide cache, every test starts from an empty one
+    commons.memory_cache.clear()
+    yield commons.memory_cache
+    commons.memory_cache.clear()
+
+
+def test_partial_fetch_from_data_page(mocker, dataset_server, codelist):
+    url, paths = dataset_server
+    mocker.patch(
+        "datawizard.data.get_cached_session",
+        return_value=requests_cache.CachedSession(backend="memory"),
+    )
+    mocker.patch("datawizard.data.DATASET_ENDPOINT", url + "/data/{code}?format=TSV")
+    mocker.patch(
+        "datawizard.data.DATASET_FILTER_ENDPOINT", url + "/data/{code}/{key}?format=TSV"
+    )
+    mocker.patch.object(commons, "load_last_updates", return_value=pd.Series())
+    mocker.patch.object(
+        commons,
+        "load_time_coverage",
+        return_value=pd.DataFrame(
+            {"data start": ["2015"], "data end": ["2021"]}, index=["FAKE"]
+        ),
+    )
+    mocker.patch.object(
+        commons,
+        "load_metabase",
+        return_value=pd.DataFrame(
+            [
+                ("fake", "ind_type", "CB_EU_FOR"),
+                ("fake", "indic_is", "I_IUG_DKPC"),
+                ("fake", "unit", "PC_IND"),
+                ("fake", "geo", "AL"),
+                ("fake", "geo", "IT"),
+            ],
+            columns=["dataset", "dimension", "code"],
+            dtype="category",
+        ),
+    )
+    mocker.patch.object(commons, "load_codelists", return_value=codelist)
+
+    # Filters are offered as the `Data` page does, every one of them selected
+    indexes, flags = commons.load_dataset_filters("FAKE", partial=True)
+    assert indexes["geo"] == ["AL | Albania", "IT | Italy"]
+    assert indexes["time"] == [2015, 2021]
+    assert flags[0] == "<NA>" and "u | low reliability" in flags
+    assert paths == []
+
+    stash = {"FAKE": {"stash": True, "indexes": indexes, "flags": flags}}
+    data = commons.load_stash(stash, partial=True)
+    assert len(data) == 3
+    assert paths == [
+        "/data/FAKE/CB_EU_FOR.I_IUG_DKPC.PC_IND.AL+IT"
+        "?format=TSV&startPeriod=2015&endPeriod=2021"
+    ]
+
+
+def test_concurrent_stashes_download_once(mocker, loaded_dataset):
+    calls = []
+
+    def fetch(code, codelists, refresh=False, indexes=None):
+        calls.append(code)
+        # Concurrent loads of the same code overlap, the first code finishes last
+        time.sleep(0.1 * (3 - "ABC".index(code)))
+        return loaded_dataset.assign(value=float(ord(code)))
+
+    mocker.patch.object(commons, "fetch_and_describe_dataset", side_effect=fetch)
+    mocker.patch.object(commons, "load_last_updates", return_value=pd.Series())
+    indexes = {"unit": ["PC_IND"], "geo": ["AL | Albania", "IT | Italy"]}
+    # Sessions stash the same datasets with different flags
+    stashes = [
+        {
+            code: {"stash": True, "indexes": indexes, "flags": ["<NA>", flag]}
+            for code in "ABC"
+        }
+        for flag in ["u | low reliability", "e", "p", "f"]
+    ]
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda stash: commons.load_stash(stash), stashes))
+    assert sorted(calls) == ["A", "B", "C"]
+    assert len(results[0]) == 3 * len(loaded_dataset)
+    assert all(len(result) == 3 * 2 for result in results[1:])
+    # Every dataset keeps its code, whatever the order loads complete in
+    for result in results:
+        values = result["value"].groupby(level="dataset").unique()
+        assert values.to_dict() == {code: [ord(code)] for code in "ABC"}
+
+
+def test_map_concurrently_keeps_order():
+    def slow_square(x):
+        time.sleep(0.01 * (5 - x))  # First items are the last to finish
+        return x**2
+
+    assert commons.map_concurrently(slow_square, range(5)) == [0, 1, 4, 9, 16]
@@ -0,0 +1,113 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_index_equal, assert_series_equal
+
+from datawizard.index import DatasetIndex, read_dataset_index
+
+
+@pytest.fixture
+def dataset_index(metabase):
+    extra = pd.DataFrame(
+        {
+            "dataset": ["gbv_dv_occ", "lfsa_pgaed"],
+            "dimension": ["geo", "geo"],
+            "code": ["IT", "IT"],
+        }
+    )
+    return DatasetIndex.from_metabase(pd.concat([metabase, extra]))
+
+
+def test_from_metabase(dataset_index):
+    assert dataset_index.keys.tolist() == [
+        ("geo", "IT"),
+        ("occur", "ADLH"),
+        ("occur", "M12"),
+        ("occur", "Y5"),
+    ]
+    assert dataset_index.datasets.tolist() == [
+        "gbv_any_occ",
+        "gbv_dv_occ",
+        "lfsa_pgaed",
+    ]
+    assert dataset_index.offsets.tolist() == [0, 2, 4, 6, 8]
+    assert dataset_index.ids.tolist() == [1, 2, 0, 1, 0, 1, 0, 1]
+
+
+def test_from_categorical_metabase(metabase, dataset_index):
+    index = DatasetIndex.from_metabase(metabase.astype("category"))
+    assert_index_equal(index.datasets, dataset_index.datasets[:2])
+    assert index.keys.tolist() == dataset_index.keys[1:].tolist()
+
+
+def test_count(dataset_index):
+    counts = dataset_index.count([("geo", "IT"), ("occur", "Y5"), ("fake", "key")])
+    expected = pd.Series(
+        [2, 1, 1],
+        index=pd.Index(["gbv_dv_occ", "gbv_any_occ", "lfsa_pgaed"], name="dataset"),
+        name="count",
+    )
+    assert_series_equal(counts, expected)
+    assert dataset_index.count([]).empty
+
+
+def test_query(dataset_index):
+    keys = [("geo", "IT"), ("occur", "Y5")]
+    assert dataset_index.query(keys).tolist() == [
+        "gbv_any_occ",
+        "gbv_dv_occ",
+        "lfsa_pgaed",
+    ]
+    assert dataset_index.query(keys, how="all").tolist() == ["gbv_dv_occ"]
+    # No dataset uses an unknown key
+    assert dataset_index.query([*keys, ("fake", "key")], how="all").empty
+
+
+def test_datasets_of(dataset_index):
+    assert dataset_index.datasets_of(("geo", "IT")).tolist() == [
+        "gbv_dv_occ",
+        "lfsa_pgaed",
+    ]
+    assert dataset_index.datasets_of(("fake", "key")).empty
+
+
+def test_save_load(tmp_path, dataset_index):
+    path = os.path.join(tmp_path, "index.npz")
+    assert read_dataset_index(timedelta(days=1), path) is None
+
+    dataset_index.save(path)
+    index = read_dataset_index(timedelta(days=1), path)
+    assert_index_equal(index.keys, dataset_index.keys)  # type: ignore
+    assert_index_equal(index.datasets, dataset_index.datasets)  # type: ignore
+    np.testing.assert_array_equal(index.offsets, dataset_index.offsets)  # type: ignore
+    np.testing.assert_array_equal(index.ids, dataset_index.ids)  # type: ignore
+
+
+def test_match(dataset_index):
+    # geo IT AND (occur Y5 OR occur M12)
+    counts = dataset_index.match([[("geo", "IT")], [("occur", "Y5"), ("occur", "M12")]])
+    expected = pd.Series(
+        [3], index=pd.Index(["gbv_dv_occ"], name="dataset"), name="count"
+    )
+    assert_series_equal(counts, expected)
+    assert dataset_index.match([]).empty
+
+
+def test_match_bitsets():
+    # Compare with sets of datasets, on more datasets than bits in a byte
+    rng = np.random.default_rng(42)
+    metabase = pd.DataFrame(
+        {
+            "dataset": [f"ds{i}" for i in rng.integers(0, 50, 500)],
+            "dimension": rng.choice(["geo", "unit"], 500),
+            "code": [f"C{i}" for i in rng.integers(0, 20, 500)],
+        }
+    )
+    index = DatasetIndex.from_metabase(metabase)
+    uses = metabase.groupby(["dimension", "code"])["dataset"].agg(set)
+    clauses = [uses.index[:3].tolist(), uses.index[20:22].tolist()]
+    expected = set.union(*uses.iloc[:3]) & set.union(*uses.iloc[20:22])
+    assert set(index.match(clauses).index) == expected
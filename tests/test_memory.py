@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from datawizard.memory import MemoryCache, size_of
+
+
+def test_memory_cache_evicts_least_recently_used():
+    frames = {code: pd.DataFrame({"value": range(100)}) for code in "ABC"}
+    size = size_of(frames["A"])
+    cache = MemoryCache(2 * size)
+    calls = []
+
+    @cache.cached
+    def load(code):
+        calls.append(code)
+        return frames[code]
+
+    assert load("A") is frames["A"]
+    load("B")
+    load("A")  # B is now the least recently used
+    load("C")
+    assert cache.usage() == {
+        "entries": 2,
+        "bytes": 2 * size,
+        "max_bytes": 2 * size,
+        "hits": 1,
+        "misses": 3,
+        "evictions": 1,
+    }
+    load("A")
+    load("B")
+    assert calls == ["A", "B", "C", "B"]
+
+    load.clear()
+    assert cache.usage()["entries"] == 0
+    assert cache.usage()["bytes"] == 0
+
+
+def test_memory_cache_keys_by_content():
+    cache = MemoryCache(2**20)
+    calls = []
+
+    @cache.cached
+    def load(stash):
+        calls.append(stash)
+        return pd.Series(dtype=float)
+
+    load({"A": {"flags": ["e"], "stash": True}, "B": {"flags": [], "stash": True}})
+    load({"B": {"flags": [], "stash": True}, "A": {"flags": ["e"], "stash": True}})
+    load({"A": {"flags": [], "stash": True}})
+    assert len(calls) == 2
+
+
+def test_memory_cache_skips_oversized_entries():
+    cache = MemoryCache(10)
+
+    @cache.cached
+    def load():
+        return pd.DataFrame({"value": range(100)})
+
+    assert load() is not load()
+    assert cache.usage()["entries"] == 0
+
+
+def test_memory_cache_computes_once_concurrently():
+    cache = MemoryCache(2**20)
+    calls = []
+
+    @cache.cached
+    def load(code):
+        calls.append(code)
+        return pd.Series(range(10))
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(load, ["A"] * 32))
+    assert calls == ["A"]
+    assert all(result is results[0] for result in results)
+
+
+def test_memory_cache_keys_by_token():
+    cache = MemoryCache(2**20)
+    versions = {"A": "2023-01-01"}
+    calls = []
+
+    @cache.cached(key=lambda code, codelist: (code, versions[code]))
+    def load(code, codelist):
+        calls.append(code)
+        return pd.Series(range(10))
+
+    codelist = pd.DataFrame({"label": range(1000)})
+    load("A", codelist)
+    load("A", codelist.copy())
+    assert len(calls) == 1
+    versions["A"] = "2023-02-01"  # A new version is published
+    load("A", codelist)
+    assert len(calls) == 2
+
+
+def test_memory_cache_releases_failing_keys():
+    cache = MemoryCache(2**20)
+
+    @cache.cached
+    def load(code):
+        raise ValueError(f"No data found for {code}")
+
+    with pytest.raises(ValueError):
+        load("A")
+    assert cache._key_locks == {}
+    assert cache.usage()["entries"] == 0
@@ -0,0 +1,22 @@
+from datawizard.refresh import refresh_datasets
+from datawizard.store import stored_datasets, write_dataset
+
+
+def test_refresh_datasets(mocker, tmp_path, loaded_dataset):
+    write_dataset("A", "2023-05-30T11:00:00+0200", loaded_dataset, tmp_path)
+    write_dataset("B", "2023-05-30T11:00:00+0200", loaded_dataset, tmp_path)
+    last_updates = {
+        "A": "2023-05-30T11:00:00+0200",
+        "B": "2023-06-30T11:00:00+0200",
+        "C": "2023-06-30T11:00:00+0200",
+    }
+    load = mocker.Mock(return_value=loaded_dataset)
+
+    report = refresh_datasets(last_updates, load, path=tmp_path)  # type: ignore
+    assert report["status"].to_dict() == {"A": "up-to-date", "B": "refreshed"}
+    load.assert_called_once_with("B")
+    assert stored_datasets(tmp_path)["tag"]["B"] == "20230630T090000"
+
+    report = refresh_datasets(last_updates, load, ["C", "D"], tmp_path)  # type: ignore
+    assert report["status"].to_dict() == {"C": "new", "D": "unknown"}
+    assert report["bytes"].isna().tolist() == [False, True]
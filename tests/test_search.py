@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from datawizard.search import SearchIndex, tokenize
+
+
+@pytest.fixture
+def search_index():
+    titles = pd.Series(
+        [
+            "Business surveys - monthly data",
+            "Unemployment by sex and age - monthly data",
+            "Population on 1 January by age and sex",
+        ],
+        index=["EI_BSCO_M", "UNE_RT_M", "DEMO_PJAN"],
+    )
+    return SearchIndex.from_texts(titles.index + " " + titles)
+
+
+def test_tokenize():
+    assert tokenize("Une_rt_M by  SEX") == ["une_rt_m", "by", "sex"]
+
+
+def test_search(search_index):
+    assert search_index.search("monthly").index.tolist() == ["EI_BSCO_M", "UNE_RT_M"]
+    # Every word must match
+    assert search_index.search("monthly sex").index.tolist() == ["UNE_RT_M"]
+    # Words match as prefixes of terms, codes also by their parts
+    assert search_index.search("popul").index.tolist() == ["DEMO_PJAN"]
+    assert search_index.search("bsco").index.tolist() == ["EI_BSCO_M"]
+    assert search_index.search("une_rt").index.tolist() == ["UNE_RT_M"]
+    assert search_index.search("").empty
+    assert search_index.search("missing").empty
+
+
+def test_search_ranking():
+    texts = pd.Series(["agency", "age groups", "average age"], index=["a", "b", "c"])
+    search_index = SearchIndex.from_texts(texts)
+    # Whole terms rank before prefixes, ties in text order
+    scores = search_index.search("age")
+    assert scores.index.tolist() == ["b", "c", "a"]
+    assert scores.tolist() == [2, 2, 1]
+    assert search_index.search("age", limit=1).index.tolist() == ["b"]
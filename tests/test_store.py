@@ -0,0 +1,88 @@
+import os
+from datetime import timedelta
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from datawizard.store import (
+    dataset_path,
+    index_to_frame,
+    read_codelist,
+    read_dataset,
+    read_table_of_contents,
+    stored_datasets,
+    write_codelist,
+    write_dataset,
+    write_table_of_contents,
+)
+
+
+def test_dataset_path():
+    path = dataset_path("EI_BSCO_M", "2023-05-30T11:00:00+0200", "store")
+    assert path == os.path.join("store", "EI_BSCO_M.20230530T090000.arrow")
+
+
+def test_read_write_dataset(tmp_path, loaded_dataset):
+    assert read_dataset("fake-code", "2023-05-30T11:00:00+0200", tmp_path) is None
+
+    write_dataset("fake-code", "2023-05-30T11:00:00+0200", loaded_dataset, tmp_path)
+    data = read_dataset("fake-code", "2023-05-30T11:00:00+0200", tmp_path)
+    assert_frame_equal(data, loaded_dataset)  # type: ignore
+
+    # A newer version replaces the previous one
+    write_dataset("fake-code", "2023-06-30T11:00:00+0200", loaded_dataset, tmp_path)
+    assert read_dataset("fake-code", "2023-05-30T11:00:00+0200", tmp_path) is None
+    assert os.listdir(tmp_path) == ["fake-code.20230630T090000.arrow"]
+
+
+def test_read_dataset_memory_mapped(tmp_path, loaded_dataset):
+    write_dataset("fake-code", "2023-05-30T11:00:00+0200", loaded_dataset, tmp_path)
+    data = read_dataset("fake-code", "2023-05-30T11:00:00+0200", tmp_path)
+    # Values and index codes are read-only views of the file, NaN included
+    assert not data["value"].to_numpy().flags.writeable  # type: ignore
+    assert not any(codes.flags.writeable for codes in data.index.codes)  # type: ignore
+    assert data["value"].isna().sum() == 1  # type: ignore
+
+
+def test_read_feather_dataset(tmp_path, loaded_dataset):
+    # Datasets stored as compressed feather are still read
+    frame = index_to_frame(loaded_dataset.index)  # type: ignore
+    frame["flag"] = loaded_dataset["flag"].values
+    frame["value"] = loaded_dataset["value"].to_numpy()
+    frame.to_feather(dataset_path("fake-code", "2023-05-30T11:00:00+0200", tmp_path))
+    data = read_dataset("fake-code", "2023-05-30T11:00:00+0200", tmp_path)
+    assert_frame_equal(data, loaded_dataset)  # type: ignore
+
+
+def test_stored_datasets(tmp_path, loaded_dataset):
+    assert stored_datasets(tmp_path).empty
+    write_dataset("B", "2023-05-30T11:00:00+0200", loaded_dataset, tmp_path)
+    write_dataset("A", "2023-06-30T11:00:00+0200", loaded_dataset, tmp_path)
+    stored = stored_datasets(tmp_path)
+    assert stored.index.tolist() == ["A", "B"]
+    assert stored["tag"].tolist() == ["20230630T090000", "20230530T090000"]
+    assert (stored["bytes"] > 0).all()
+
+
+def test_read_write_codelist(tmp_path, codelist):
+    path = os.path.join(tmp_path, "codelist.arrow")
+    assert read_codelist(timedelta(days=1), path) is None
+
+    write_codelist(codelist, path)
+    assert_frame_equal(read_codelist(timedelta(days=1), path), codelist)  # type: ignore
+
+    # An outdated codelist is not served
+    os.utime(path, (0, 0))
+    assert read_codelist(timedelta(days=1), path) is None
+
+
+def test_read_write_table_of_contents(tmp_path):
+    path = os.path.join(tmp_path, "toc.arrow")
+    toc = pd.DataFrame(
+        {"title": ["Consumers - monthly data"], "last update of data": ["2023-05-30"]},
+        index=pd.Index(["EI_BSCO_M"], name="code"),
+    )
+    assert read_table_of_contents(timedelta(days=1), path) is None
+
+    write_table_of_contents(toc, path)
+    assert_frame_equal(read_table_of_contents(timedelta(days=1), path), toc)  # type: ignore
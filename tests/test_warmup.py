@@ -0,0 +1,25 @@
+import os
+from datetime import timedelta
+
+from datawizard.warmup import warm_files
+
+
+def test_warm_files(mocker, tmp_path):
+    fresh, missing = os.path.join(tmp_path, "fresh"), os.path.join(tmp_path, "missing")
+    with open(fresh, "w") as file:
+        file.write("built")
+
+    def build():
+        with open(missing, "w") as file:
+            file.write("built again")
+
+    keep = mocker.Mock()
+    report = warm_files({fresh: keep, missing: build}, timedelta(days=1))
+    keep.assert_not_called()
+    assert report["status"].tolist() == ["fresh", "built"]
+    assert report["bytes"].tolist() == [5, 11]
+    assert report["updated"].notna().all()
+
+    # Every file is built again without a `max_age`
+    report = warm_files({fresh: keep}, timedelta(0))
+    keep.assert_called_once()